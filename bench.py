@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+import argparse
+import atexit
+import gc
+import html
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# The suite writes real stores and caches; keep them away from the user's data.
+BENCH_DIR = Path(tempfile.mkdtemp(prefix="marks-bench-"))
+atexit.register(shutil.rmtree, BENCH_DIR, True)
+os.environ["MARKS_DATA_FILE"] = str(BENCH_DIR / "bookmarks.json")
+os.environ["XDG_CACHE_HOME"] = str(BENCH_DIR / "cache")
+
+import main  # noqa: E402
+
+WORDS = (
+    "python rust linux kernel git docker recipe travel music video news blog "
+    "guide tutorial release notes api reference design paper science history "
+    "garden bike camera finance tax health running coffee chess climbing"
+).split()
+SEARCH_QUERIES = ["python", "git guide", "site1", "linux kernel notes", "zzzz"]
+TYPED_QUERY = "docker tutorial"
+FUZZY_QUERY = "pytut"  # SearchSession.fuzzy takes the query without the "~" prefix
+SUITE_COUNTS = [10_000, 100_000]
+REGRESSION_THRESHOLD = 0.10
+
+
+def generate_fields(count: int, seed: int = 1) -> List[Tuple[str, str, str, str]]:
+    rng = random.Random(seed)
+    folders = [f"Folder {i}" for i in range(max(1, count // 500))]
+    rows = []
+    for i in range(count):
+        words = " ".join(rng.sample(WORDS, 3))
+        title = f"Bookmark {i} about {words} {rng.randrange(10000)}"
+        url = f"https://site{rng.randrange(count // 10 + 1)}.example.com/page/{i}"
+        note = f"note {i} {rng.choice(WORDS)}" if rng.random() < 0.3 else ""
+        rows.append((title, url, rng.choice(folders), note))
+    return rows
+
+
+def generate_bookmarks(count: int, seed: int = 1) -> List["main.Bookmark"]:
+    return [main.Bookmark(t, u, f, n) for t, u, f, n in generate_fields(count, seed)]
+
+
+def write_netscape_html(path: Path, count: int, seed: int = 1) -> None:
+    # Same shape as a browser export: a toolbar folder holding one <DL> per
+    # folder, with ADD_DATE/ICON attributes the parser has to skip over.
+    by_folder: Dict[str, List[Tuple[str, str]]] = {}
+    for title, url, folder, _ in generate_fields(count, seed):
+        by_folder.setdefault(folder, []).append((title, url))
+    icon = "data:image/png;base64," + "A" * 96
+    with path.open("w", encoding="utf-8") as fh:
+        fh.write(
+            "<!DOCTYPE NETSCAPE-Bookmark-file-1>\n"
+            '<META HTTP-EQUIV="Content-Type" CONTENT="text/html; charset=UTF-8">\n'
+            "<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n"
+            '    <DT><H3 ADD_DATE="1700000000" PERSONAL_TOOLBAR_FOLDER="true">Bookmarks bar</H3>\n'
+            "    <DL><p>\n"
+        )
+        for folder, items in by_folder.items():
+            fh.write(f'        <DT><H3 ADD_DATE="1700000000">{html.escape(folder)}</H3>\n        <DL><p>\n')
+            for i, (title, url) in enumerate(items):
+                fh.write(
+                    f'            <DT><A HREF="{html.escape(url)}" ADD_DATE="{1700000000 + i}" '
+                    f'ICON="{icon}">{html.escape(title)}</A>\n'
+                )
+            fh.write("        </DL><p>\n")
+        fh.write("    </DL><p>\n</DL><p>\n")
+
+
+def traced_size(build: Callable[[], object]) -> Tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def traced_peak(run: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_memory(count: int) -> Dict[str, int]:
+    rows = generate_fields(count)
+    # Strings are shared by both layouts, so only the containers are measured.
+    dict_bytes, dicts = traced_size(
+        lambda: [{"title": t, "url": u, "folder": f, "note": n} for t, u, f, n in rows]
+    )
+    slot_bytes, records = traced_size(lambda: [main.Bookmark(t, u, f, n) for t, u, f, n in rows])
+    round_trip = [main.clean_bookmark(item) for item in json.loads(json.dumps([bm.to_dict() for bm in records]))]
+    if round_trip != records or [bm.to_dict() for bm in records] != dicts:
+        raise SystemExit("JSON round trip changed the records.")
+    return {"count": count, "dict_bytes": dict_bytes, "bookmark_bytes": slot_bytes}
+
+
+# One timed case: ``run`` is called ``repeat`` times and the best time is
+# kept; ``setup`` runs untimed before each call. ``items`` is the amount
+# of work per call used for the throughput column.
+class Case:
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], object],
+        items: int,
+        setup: Optional[Callable[[], None]] = None,
+        unit: str = "items",
+    ):
+        self.name = name
+        self.run = run
+        self.items = items
+        self.setup = setup
+        self.unit = unit
+
+    def measure(self, repeat: int, memory: bool) -> Dict[str, float]:
+        best = float("inf")
+        for _ in range(max(1, repeat)):
+            if self.setup is not None:
+                self.setup()
+            gc.collect()
+            start = time.perf_counter()
+            self.run()
+            best = min(best, time.perf_counter() - start)
+        result = {"seconds": best, "rate": self.items / best if best > 0 else 0.0}
+        if memory:
+            if self.setup is not None:
+                self.setup()
+            result["peak_bytes"] = traced_peak(self.run)
+        return result
+
+
+def reset_store() -> None:
+    if main._STORE is not None:
+        main._STORE.close()
+    main._STORE = None
+
+
+def drop_caches() -> None:
+    reset_store()
+    for path in main.CACHE_DIR.glob("snapshot-*.bin"):
+        path.unlink()
+
+
+def list_to_devnull(query: List[str], folder: Optional[str] = None) -> None:
+    args = argparse.Namespace(
+        query=query,
+        folder=folder,
+        fuzzy=False,
+        limit=0,
+        offset=0,
+        format="plain",
+        include_note=False,
+    )
+    stdout = sys.stdout
+    with open(os.devnull, "w", encoding="utf-8") as sys.stdout:
+        try:
+            main.handle_cli_list(args)
+        finally:
+            sys.stdout = stdout
+
+
+def suite_cases(count: int) -> List[Case]:
+    bookmarks = generate_bookmarks(count)
+    main.save_bookmarks(bookmarks)
+    # As in the TUI, a SQLite store narrows searches with its FTS index.
+    store = main.open_store()
+    candidates = store.candidates if store.name == "sqlite" else None
+    index = main.BookmarkIndex(bookmarks, candidates)
+    index.build_step()
+    folders = index.folders()
+    some_folders = folders[:: max(1, len(folders) // 10)]
+    export = BENCH_DIR / f"export-{count}.html"
+    write_netscape_html(export, count)
+
+    def search_all() -> None:
+        session = main.SearchSession(index)
+        for query in SEARCH_QUERIES:
+            session.search(query)
+
+    def search_typed() -> None:
+        # One search per keystroke, as the TUI does while the query is typed.
+        session = main.SearchSession(index)
+        for end in range(1, len(TYPED_QUERY) + 1):
+            session.search(TYPED_QUERY[:end])
+
+    def drop_folder_cache() -> None:
+        # folder_positions() caches per index generation; every run must
+        # do the lookup, not return the cached list.
+        index._folder_cache = {}
+
+    def filter_folders() -> None:
+        for folder in some_folders:
+            index.folder_positions(folder)
+
+    def scan_folders() -> None:
+        wanted = {main.folder_key(folder) for folder in some_folders}
+        for key in wanted:
+            [pos for pos, bm in enumerate(bookmarks) if main.folder_key(bm.folder) == key]
+
+    typed = len(TYPED_QUERY)
+    return [
+        Case("save", lambda: main.save_bookmarks(bookmarks), count),
+        Case("load (cold)", main.load_bookmarks, count, setup=drop_caches),
+        Case("load (cached)", main.load_bookmarks, count, setup=reset_store),
+        Case("index open", lambda: main.BookmarkIndex(bookmarks, candidates), count),
+        Case("index build", lambda: main.BookmarkIndex(bookmarks, candidates).build_step(), count),
+        Case("search", search_all, len(SEARCH_QUERIES), unit="queries"),
+        Case("search (typed)", search_typed, typed, unit="keys"),
+        Case("search (fuzzy)", lambda: main.SearchSession(index).fuzzy(FUZZY_QUERY, 200), count),
+        Case("folder filter", filter_folders, len(some_folders), setup=drop_folder_cache, unit="folders"),
+        Case("folder filter (scan)", scan_folders, len(some_folders), unit="folders"),
+        Case("folder index", lambda: (index.folders(), index.folder_counts()), 1, unit="calls"),
+        Case("list", lambda: list_to_devnull([]), count, setup=reset_store),
+        Case("list (query)", lambda: list_to_devnull(["python"]), count, setup=reset_store),
+        Case("import html", lambda: main.import_bookmarks_html(export), count),
+    ]
+
+
+def run_suite(counts: List[int], repeat: int, memory: bool, only: List[str]) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+    for count in counts:
+        cases = suite_cases(count)
+        print(f"{count} bookmarks ({main.open_store().name} backend)")
+        results[str(count)] = {}
+        for case in cases:
+            if only and not any(word in case.name for word in only):
+                continue
+            result = case.measure(repeat, memory)
+            results[str(count)][case.name] = result
+            print(f"  {format_result(case, result)}", flush=True)
+        reset_store()
+    return results
+
+
+def format_result(case: Case, result: Dict[str, float]) -> str:
+    line = f"{case.name:<22}{result['seconds'] * 1000:>10.1f} ms{result['rate']:>14,.0f} {case.unit}/s"
+    if "peak_bytes" in result:
+        line += f"   peak {format_bytes(int(result['peak_bytes']))}"
+    return line
+
+
+def compare_results(baseline: Dict, results: Dict, threshold: float) -> int:
+    regressions = 0
+    for count, cases in results.items():
+        old_cases = baseline.get("results", {}).get(count)
+        if not old_cases:
+            print(f"{count} bookmarks: not in the baseline")
+            continue
+        print(f"{count} bookmarks vs baseline")
+        for name, result in cases.items():
+            old = old_cases.get(name)
+            if not old or not old.get("seconds"):
+                continue
+            change = result["seconds"] / old["seconds"] - 1
+            marker = ""
+            if change > threshold:
+                marker = "  REGRESSION"
+                regressions += 1
+            line = f"  {name:<22}{old['seconds'] * 1000:>10.1f} -> {result['seconds'] * 1000:.1f} ms ({change:+.0%})"
+            if "peak_bytes" in result and old.get("peak_bytes"):
+                line += f", peak {format_bytes(int(old['peak_bytes']))} -> {format_bytes(int(result['peak_bytes']))}"
+            print(line + marker)
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks for marks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    memory = sub.add_parser("memory", help="Compare dict records with the slotted Bookmark type.")
+    memory.add_argument("-n", "--count", type=int, action="append", help="Number of bookmarks (repeatable).")
+    suite = sub.add_parser("suite", help="Time load/save, search, folders, list and import on synthetic data.")
+    suite.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        action="append",
+        help="Number of bookmarks (repeatable; default: 10000 and 100000).",
+    )
+    suite.add_argument("--repeat", type=int, default=3, help="Runs per case; the best time is kept (default: 3).")
+    suite.add_argument("--backend", choices=("json", "sqlite"), default="json", help="Storage backend (default: json).")
+    suite.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory runs.")
+    suite.add_argument("--only", action="append", default=[], help="Run only cases whose name contains TEXT.")
+    suite.add_argument("--save", metavar="FILE", help="Write the results to FILE as a baseline.")
+    suite.add_argument("--compare", metavar="FILE", help="Compare against a baseline saved with --save.")
+    suite.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="Slowdown reported as a regression with --compare (default: 0.10 = 10%%).",
+    )
+    return parser.parse_args()
+
+
+def format_bytes(value: int) -> str:
+    return f"{value / (1024 * 1024):.1f} MiB"
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "memory":
+        for count in args.count or [10_000, 100_000, 1_000_000]:
+            result = bench_memory(count)
+            saved = 1 - result["bookmark_bytes"] / max(1, result["dict_bytes"])
+            print(
+                f"{count:>9} bookmarks: dict {format_bytes(result['dict_bytes'])}, "
+                f"Bookmark {format_bytes(result['bookmark_bytes'])} ({saved:.0%} less)"
+            )
+    elif args.command == "suite":
+        os.environ["MARKS_BACKEND"] = args.backend
+        results = run_suite(args.count or SUITE_COUNTS, args.repeat, not args.no_memory, args.only)
+        status = 0
+        if args.compare:
+            with open(args.compare, "r", encoding="utf-8") as fh:
+                baseline = json.load(fh)
+            if compare_results(baseline, results, args.threshold):
+                status = 1
+        if args.save:
+            payload = {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "backend": args.backend,
+                "repeat": args.repeat,
+                "results": results,
+            }
+            with open(args.save, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, indent=2)
+                fh.write("\n")
+        sys.exit(status)
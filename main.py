@@ -1,18 +1,42 @@
 #!/usr/bin/env python3
 import argparse
+import codecs
 import curses
 import json
 import curses.ascii
+import hashlib
+import heapq
+import marshal
 import os
+import re
 import shutil
+import signal
 import subprocess
 import sys
+import tempfile
+import threading
 import time
 import webbrowser
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlencode, urljoin, urlsplit, urlunsplit
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Set, Tuple
 from html.parser import HTMLParser
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+# Only the modes that need them import these (launcher starts stay fast).
+if TYPE_CHECKING:
+    import cProfile
+    import http.client
+    import sqlite3
+
 
 DATA_FILE = Path(
     os.environ.get(
@@ -22,6 +46,7 @@ DATA_FILE = Path(
 )
 
 CONFIG_FILE = Path.home() / ".config" / "marks" / "config"
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "marks"
 TERM_COLORS = [
     (1, "Red"),
     (2, "Green"),
@@ -55,34 +80,1139 @@ SHORTCUTS_SEGMENTS = [
     (" Quit", False),
 ]
 
+SEARCH_FIELDS = ("title", "url", "folder", "note")
+WORD_RE = re.compile(r"\w+")
+GRAM_SIZE = 3
+INDEX_BUILD_CHUNK = 2048
+INDEX_SCAN_SHARE = 4  # a word lookup matching over 1/4 of the list is skipped
+ID_STRIDE = 1 << 8
+ID_RESPACE_GAP = ID_STRIDE >> 3
+FUZZY_PREFIX = "~"
+FUZZY_MATCH = 16
+FUZZY_BOUNDARY = 8
+FUZZY_CONSECUTIVE = 4
+FUZZY_GAP_START = -3
+FUZZY_GAP_EXTENSION = -1
+FUZZY_TITLE_BONUS = 32
+FUZZY_MARGIN = 32
+SEARCH_DEBOUNCE_MS = 40
+SEARCH_CHUNK = 4096
+SEARCH_WAIT = 0.05
+SEARCH_POLL_MS = 50
+AUTOSAVE_SECONDS = 2.0
+
+
+JOURNAL_FILE = DATA_FILE.with_name(DATA_FILE.name + ".journal")
+LOCK_FILE = DATA_FILE.with_name(DATA_FILE.name + ".lock")
+UNDO_FILE = DATA_FILE.with_name(DATA_FILE.name + ".undo")
+UNDO_LIMIT = 200
+LINKS_FILE = DATA_FILE.with_name(DATA_FILE.name + ".links")
+LOCK_WARN_SECONDS = 0.5
+SNAPSHOT_CACHE_VERSION = 1
+URL_INDEX_VERSION = 2
+LOCK_STATS = {"acquired": 0, "wait_total": 0.0, "wait_max": 0.0}
+PROFILE_FILE = CACHE_DIR / "profile.jsonl"
+# Compact once the journal outgrows both limits (bytes, and share of snapshot size)
+COMPACT_MIN_BYTES = 256 * 1024
+COMPACT_RATIO = 0.5
+
+
+class StorageError(Exception):
+    pass
+
+
+def process_age() -> float:
+    # Seconds since this process was started, from /proc on Linux (10ms
+    # resolution); 0 where that is not available.
+    try:
+        with open("/proc/self/stat", "rb") as fh:
+            fields = fh.read().rsplit(b")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - started)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0.0
+
+
+# Per-phase timings and counters for --profile / MARKS_PROFILE. Each phase
+# is appended to a JSON-lines trace as it ends and summed for the summary
+# printed on exit. Times count from process start, so ``startup`` covers
+# interpreter start and module imports. Lines carry the pid because several
+# processes (the TUI, launchers) may append to one trace. Disabled, a phase
+# costs one attribute check, so the hot paths stay instrumented all the
+# time. The search and autosave threads report too, hence the lock.
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.trace = None
+        self.path: Optional[Path] = None
+        self.phases: Dict[str, List[float]] = {}  # name -> [count, total, max]
+        self.counters: Dict[str, int] = {}
+        self.cprofile: Optional["cProfile.Profile"] = None
+        self.cprofile_path: Optional[Path] = None
+
+    def start(self, path: Path, cprofile_path: Optional[Path] = None) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Line buffered so each entry is one append-mode write.
+        self.trace = path.open("a", encoding="utf-8", buffering=1)
+        self.path = path
+        self.started = time.perf_counter() - process_age()
+        self.enabled = True
+        if cprofile_path is not None:
+            import cProfile
+
+            self.cprofile_path = cprofile_path
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    @contextmanager
+    def phase(self, name: str, **fields: object) -> Iterator[Dict[str, object]]:
+        # Callers may add fields (counts, sizes) to the yielded dict.
+        if not self.enabled:
+            yield fields
+            return
+        started = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(name, time.perf_counter() - started, **fields)
+
+    def record(self, name: str, seconds: float, **fields: object) -> None:
+        if not self.enabled:
+            return
+        entry = {
+            "pid": os.getpid(),
+            "t": round(time.perf_counter() - self.started, 6),
+            "phase": name,
+            "ms": round(seconds * 1000, 3),
+        }
+        entry.update(fields)
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self.lock:
+            totals = self.phases.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+            if self.trace is not None:
+                self.trace.write(line)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(str(self.cprofile_path))
+        with self.lock:
+            self.enabled = False
+            summary = {
+                "phases": {
+                    name: {"count": int(count), "total_ms": round(total * 1000, 3), "max_ms": round(peak * 1000, 3)}
+                    for name, (count, total, peak) in self.phases.items()
+                },
+                "counters": dict(self.counters),
+                "elapsed_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            }
+            self.trace.write(json.dumps({"pid": os.getpid(), "summary": summary}) + "\n")
+            self.trace.close()
+            self.trace = None
+        print(f"marks: profile of {summary['elapsed_ms'] / 1000:.2f}s run, trace in {self.path}", file=sys.stderr)
+        for name, (count, total, peak) in sorted(self.phases.items(), key=lambda item: -item[1][1]):
+            print(
+                f"  {name:<12}{int(count):>7}x {total * 1000:>10.1f} ms total "
+                f"{total * 1000 / count:>9.2f} ms avg {peak * 1000:>9.2f} ms max",
+                file=sys.stderr,
+            )
+        for name, value in sorted(self.counters.items()):
+            print(f"  {name:<12}{value:>12,}", file=sys.stderr)
+        if self.cprofile is not None:
+            print(f"  cProfile stats in {self.cprofile_path} (python -m pstats)", file=sys.stderr)
+
+
+PROFILER = Profiler()
+
+
+class Bookmark:
+    # Slotted record: a fraction of the memory of a 4-key dict per bookmark.
+    __slots__ = ("title", "url", "folder", "note")
+
+    def __init__(self, title: str, url: str, folder: str = "General", note: str = "") -> None:
+        self.title = title
+        self.url = url
+        self.folder = sys.intern(folder)
+        self.note = note
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"title": self.title, "url": self.url, "folder": self.folder, "note": self.note}
+
+    def as_tuple(self) -> Tuple[str, str, str, str]:
+        return (self.title, self.url, self.folder, self.note)
+
+    def replace(self, **changes: str) -> "Bookmark":
+        values = self.to_dict()
+        values.update(changes)
+        return Bookmark(**values)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Bookmark):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    __hash__ = None  # mutable
+
+    def __repr__(self) -> str:
+        return f"Bookmark(title={self.title!r}, url={self.url!r}, folder={self.folder!r}, note={self.note!r})"
+
+
+@contextmanager
+def data_lock(exclusive: bool = True) -> Iterator[None]:
+    # Advisory lock shared by the TUI and every CLI mode; not re-entrant.
+    if fcntl is None:
+        yield
+        return
+    LOCK_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with LOCK_FILE.open("a") as fh:
+        started = time.monotonic()
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        waited = time.monotonic() - started
+        LOCK_STATS["acquired"] += 1
+        LOCK_STATS["wait_total"] += waited
+        LOCK_STATS["wait_max"] = max(LOCK_STATS["wait_max"], waited)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def report_lock_wait() -> None:
+    if LOCK_STATS["wait_max"] >= LOCK_WARN_SECONDS:
+        print(
+            f"marks: waited {LOCK_STATS['wait_total']:.2f}s for the data lock "
+            f"({LOCK_STATS['acquired']} acquisitions, longest {LOCK_STATS['wait_max']:.2f}s).",
+            file=sys.stderr,
+        )
+
+
+def atomic_write(path: Path, data: bytes) -> None:
+    PROFILER.count("bytes_written", len(data))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o600
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def clean_bookmark(item: object) -> Optional[Bookmark]:
+    if isinstance(item, Bookmark):
+        item = item.to_dict()
+    if not isinstance(item, dict):
+        return None
+    title = str(item.get("title", "")).strip()
+    url = str(item.get("url", "")).strip()
+    folder = str(item.get("folder", "General")).strip() or "General"
+    note = str(item.get("note", "")).strip()
+    if not (title or url):
+        return None
+    return Bookmark(title, url, folder, note)
+
+
+# Per data file caches: "snapshot", "urls" and the launcher "menu".
+def cache_path(kind: str) -> Path:
+    digest = hashlib.sha1(str(DATA_FILE.resolve()).encode("utf-8")).hexdigest()[:16]
+    return CACHE_DIR / f"{kind}-{digest}.bin"
+
+
+def file_signature(stat: os.stat_result) -> Tuple[int, int, int]:
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def path_signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        return file_signature(path.stat())
+    except OSError:
+        return None
+
+
+def read_snapshot_cache(signature: Tuple[int, int, int]) -> Optional[List[Bookmark]]:
+    try:
+        data = cache_path("snapshot").read_bytes()
+        version, key, titles, urls, folder_names, folder_codes, notes = marshal.loads(data)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != SNAPSHOT_CACHE_VERSION or tuple(key) != signature:
+        return None
+    codes = array("I")
+    codes.frombytes(folder_codes)
+    return [
+        Bookmark(title, url, folder_names[code], note)
+        for title, url, code, note in zip(titles, urls, codes, notes)
+    ]
+
 
-def load_bookmarks() -> List[Dict[str, str]]:
+def write_snapshot_cache(signature: Tuple[int, int, int], bookmarks: List[Bookmark]) -> None:
+    # Columns plus an interned folder table; marshal loads this far faster
+    # than json.load() followed by clean_bookmark() on every entry.
+    folder_names: List[str] = []
+    folder_lookup: Dict[str, int] = {}
+    codes = array("I")
+    for bm in bookmarks:
+        folder = bm.folder
+        code = folder_lookup.get(folder)
+        if code is None:
+            code = folder_lookup[folder] = len(folder_names)
+            folder_names.append(folder)
+        codes.append(code)
+    payload = marshal.dumps(
+        (
+            SNAPSHOT_CACHE_VERSION,
+            signature,
+            [bm.title for bm in bookmarks],
+            [bm.url for bm in bookmarks],
+            folder_names,
+            codes.tobytes(),
+            [bm.note for bm in bookmarks],
+        )
+    )
+    try:
+        atomic_write(cache_path("snapshot"), payload)
+    except OSError:
+        pass
+
+
+def read_url_index(signature: Optional[Tuple[int, int, int]]) -> Optional[Tuple[int, Dict[str, int]]]:
+    try:
+        version, key, count, positions = marshal.loads(cache_path("urls").read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != URL_INDEX_VERSION or key != signature or not isinstance(positions, dict):
+        return None
+    return count, positions
+
+
+def write_url_index(signature: Optional[Tuple[int, int, int]], count: int, positions: Dict[str, int]) -> None:
+    try:
+        atomic_write(cache_path("urls"), marshal.dumps((URL_INDEX_VERSION, signature, count, positions)))
+    except OSError:
+        pass
+
+
+def load_snapshot() -> List[Bookmark]:
     try:
         with DATA_FILE.open("r", encoding="utf-8") as fh:
+            signature = file_signature(os.fstat(fh.fileno()))
+            cached = read_snapshot_cache(signature)
+            if cached is not None:
+                return cached
             raw = json.load(fh)
-            cleaned = []
-            for item in raw:
-                if not isinstance(item, dict):
-                    continue
-                title = str(item.get("title", "")).strip()
-                url = str(item.get("url", "")).strip()
-                folder = str(item.get("folder", "General")).strip() or "General"
-                note = str(item.get("note", "")).strip()
-                if title or url:
-                    cleaned.append(
-                        {"title": title, "url": url, "folder": folder, "note": note}
-                    )
-            return cleaned
     except FileNotFoundError:
         return []
-    except json.JSONDecodeError:
-        return []
+    except json.JSONDecodeError as exc:
+        raise StorageError(f"{DATA_FILE} is not valid JSON ({exc}); refusing to overwrite it.") from exc
+    if not isinstance(raw, list):
+        raise StorageError(f"{DATA_FILE} does not contain a list of bookmarks.")
+    cleaned = []
+    for item in raw:
+        bookmark = clean_bookmark(item)
+        if bookmark is not None:
+            cleaned.append(bookmark)
+    write_snapshot_cache(signature, cleaned)
+    return cleaned
+
+
+def read_journal() -> Tuple[List[Dict], int]:
+    try:
+        with JOURNAL_FILE.open("rb") as fh:
+            data = fh.read()
+    except FileNotFoundError:
+        return [], 0
+    ops = []
+    for line in data.splitlines():
+        try:
+            op = json.loads(line)
+        except ValueError:
+            continue  # torn write at the tail
+        if isinstance(op, dict):
+            ops.append(op)
+    return ops, len(data)
+
+
+def append_journal(ops: List[Dict]) -> int:
+    # Returns the number of bytes appended.
+    if not ops:
+        return 0
+    JOURNAL_FILE.parent.mkdir(parents=True, exist_ok=True)
+    data = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops).encode("utf-8")
+    if PROFILER.enabled:
+        PROFILER.count("bytes_written", len(data))
+    with data_lock():
+        with JOURNAL_FILE.open("ab") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+    return len(data)
+
+
+def locate_bookmark(bookmarks: List[Bookmark], position: int, old: Optional[Bookmark]) -> int:
+    if 0 <= position < len(bookmarks) and (old is None or bookmarks[position] == old):
+        return position
+    if old is not None:
+        for idx, bm in enumerate(bookmarks):
+            if bm == old:
+                return idx
+    return -1
+
+
+def apply_operation(bookmarks: List[Bookmark], op: Dict) -> None:
+    kind = op.get("op")
+    if kind == "add":
+        # An "index" puts the bookmark back at that position (undo of a delete).
+        bookmark = clean_bookmark(op.get("bookmark"))
+        position = op.get("index")
+        if bookmark is None:
+            return
+        if isinstance(position, int) and 0 <= position < len(bookmarks):
+            bookmarks.insert(position, bookmark)
+        else:
+            bookmarks.append(bookmark)
+        return
+    position = op.get("index", -1)
+    position = locate_bookmark(bookmarks, position if isinstance(position, int) else -1, clean_bookmark(op.get("old")))
+    if position < 0:
+        return
+    if kind == "delete":
+        bookmarks.pop(position)
+    elif kind == "move":
+        bookmarks[position].folder = sys.intern(str(op.get("folder", "")).strip() or "General")
+    elif kind == "edit":
+        bookmark = clean_bookmark(op.get("bookmark"))
+        if bookmark is not None:
+            bookmarks[position] = bookmark
+
+
+def replay_store() -> List[Bookmark]:
+    bookmarks = load_snapshot()
+    ops, _ = read_journal()
+    for op in ops:
+        apply_operation(bookmarks, op)
+    return bookmarks
+
+
+def write_snapshot(bookmarks: List[Bookmark]) -> None:
+    cleaned = [bm for bm in map(clean_bookmark, bookmarks) if bm is not None]
+    atomic_write(DATA_FILE, json.dumps([bm.to_dict() for bm in cleaned], indent=2).encode("utf-8"))
+    write_snapshot_cache(file_signature(DATA_FILE.stat()), cleaned)
+
+
+def clear_journal() -> None:
+    try:
+        JOURNAL_FILE.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def needs_compaction() -> bool:
+    try:
+        journal_size = JOURNAL_FILE.stat().st_size
+    except FileNotFoundError:
+        return False
+    try:
+        snapshot_size = DATA_FILE.stat().st_size
+    except FileNotFoundError:
+        snapshot_size = 0
+    return journal_size > max(COMPACT_MIN_BYTES, snapshot_size * COMPACT_RATIO)
+
+
+def schedule_compaction() -> None:
+    if not needs_compaction():
+        return
+    try:
+        # The detached child must not profile itself into the parent's trace.
+        env = {key: value for key, value in os.environ.items() if key != "MARKS_PROFILE"}
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--compact"],
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        compact_bookmarks()
+
+
+# Storage backends share one interface: load() returns the list, commit()
+# applies journal-style operations, save()/rewrite() replace everything and
+# candidates() may narrow a search to list positions (None = no help).
+# ``errors`` are the exceptions a commit may raise that are worth retrying;
+# close() releases any connection (the next call opens a new one).
+class JsonStore:
+    name = "json"
+    errors: Tuple[type, ...] = (OSError,)
+
+    def __init__(self) -> None:
+        self.path = DATA_FILE
+
+    def load(self) -> List[Bookmark]:
+        with PROFILER.phase("load", backend=self.name) as info, data_lock(exclusive=False):
+            bookmarks = replay_store()
+            info["items"] = len(bookmarks)
+        return bookmarks
+
+    def save(self, bookmarks: List[Bookmark]) -> None:
+        with data_lock():
+            write_snapshot(bookmarks)
+            clear_journal()
+
+    def rewrite(
+        self,
+        transform: Optional[Callable[[List[Bookmark]], List[Bookmark]]] = None,
+    ) -> List[Bookmark]:
+        with data_lock():
+            bookmarks = replay_store()
+            if transform is not None:
+                bookmarks = transform(bookmarks)
+            write_snapshot(bookmarks)
+            clear_journal()
+            signature = path_signature(DATA_FILE)
+        if transform is None:
+            # Compaction runs detached, so the next -a finds the URLs indexed.
+            self._index_urls(signature, bookmarks)
+        return bookmarks
+
+    def commit(self, ops: List[Dict]) -> None:
+        append_journal(ops)
+
+    def _index_urls(
+        self,
+        signature: Optional[Tuple[int, int, int]],
+        snapshot: List[Bookmark],
+    ) -> Tuple[int, Dict[str, int]]:
+        positions: Dict[str, int] = {}
+        for position, bm in enumerate(snapshot):
+            positions.setdefault(canonical_url(bm.url), position)
+        write_url_index(signature, len(snapshot), positions)
+        return len(snapshot), positions
+
+    def _snapshot_urls(self) -> Tuple[int, Dict[str, int]]:
+        # Size of the snapshot and the position of each canonical URL in it,
+        # cached like the snapshot itself and rebuilt when that changes.
+        cached = read_url_index(path_signature(DATA_FILE))
+        if cached is not None:
+            return cached
+        with data_lock(exclusive=False):
+            signature = path_signature(DATA_FILE)
+            snapshot = load_snapshot()
+        return self._index_urls(signature, snapshot)
+
+    def url_lookup(self) -> Tuple[int, Callable[[str], Optional[Tuple[int, Bookmark]]]]:
+        # A URL that is neither in the snapshot index nor added by the journal
+        # is not stored, so a miss reads no bookmarks. A hit loads them; if the
+        # journal may have moved positions, an index of the loaded list is
+        # built once and answers from then on. The size is counted from the
+        # journal and only a hint: undo finds a bookmark by content too.
+        size, positions = self._snapshot_urls()
+        ops, _ = read_journal()
+        journaled: Set[str] = set()
+        for op in ops:
+            kind = op.get("op")
+            bookmark = clean_bookmark(op.get("bookmark"))
+            if kind in ("add", "edit") and bookmark is not None:
+                journaled.add(canonical_url(bookmark.url))
+                size += kind == "add"
+            elif kind == "delete":
+                size -= 1
+        bookmarks: Optional[List[Bookmark]] = None
+
+        def find(key: str) -> Optional[Tuple[int, Bookmark]]:
+            nonlocal bookmarks, positions
+            if key not in positions and key not in journaled:
+                return None
+            if bookmarks is None:
+                bookmarks = self.load()
+                if ops or len(bookmarks) != size:
+                    # Reversed, so the first bookmark with a URL wins.
+                    canons = [canonical_url(bm.url) for bm in bookmarks]
+                    positions = dict(zip(reversed(canons), range(len(canons) - 1, -1, -1)))
+            position = positions.get(key)
+            if position is None or position >= len(bookmarks) or canonical_url(bookmarks[position].url) != key:
+                return None  # changed by another process since
+            return position, bookmarks[position]
+
+        return max(size, 0), find
+
+    def maintain(self) -> None:
+        schedule_compaction()
+
+    def close(self) -> None:
+        return
+
+    def signature(self) -> Tuple:
+        return (path_signature(DATA_FILE), path_signature(JOURNAL_FILE))
+
+    def compact(self) -> None:
+        self.rewrite()
+
+    def candidates(self, tokens: List[str]) -> Optional[List[int]]:
+        return None
+
+    def query(self, tokens: List[str], folder: Optional[str] = None) -> Iterator[Bookmark]:
+        wanted = folder_key(folder) if folder else None
+        for bm in self.load():
+            if wanted is not None and folder_key(bm.folder) != wanted:
+                continue
+            if bookmark_matches(bm, tokens):
+                yield bm
+
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    canon TEXT
+);
+CREATE INDEX IF NOT EXISTS bookmarks_folder ON bookmarks (folder COLLATE NOCASE);
+"""
+# canonical_url() of each row, for duplicate checks. Rows written without it
+# (save(), rewrite(), older versions) hold NULL until url_lookup() fills them.
+SQLITE_CANON_SCHEMA = """
+CREATE INDEX IF NOT EXISTS bookmarks_canon ON bookmarks (canon);
+"""
+# The trigram tokenizer only does simple case folding, while search tokens
+# are casefolded ("straße" -> "strasse"), so the index holds casefolded text
+# via the marks_fold() function each connection registers. Bump the version
+# to rebuild the index of existing databases (2: the update trigger skips
+# writes to the canon column).
+SQLITE_FTS_VERSION = 2
+SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS bookmarks_fts USING fts5(
+    title, url, folder, note, content='bookmarks', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS bookmarks_ai AFTER INSERT ON bookmarks BEGIN
+    INSERT INTO bookmarks_fts (rowid, title, url, folder, note)
+    VALUES (new.id, marks_fold(new.title), marks_fold(new.url), marks_fold(new.folder), marks_fold(new.note));
+END;
+CREATE TRIGGER IF NOT EXISTS bookmarks_ad AFTER DELETE ON bookmarks BEGIN
+    INSERT INTO bookmarks_fts (bookmarks_fts, rowid, title, url, folder, note)
+    VALUES ('delete', old.id, marks_fold(old.title), marks_fold(old.url), marks_fold(old.folder), marks_fold(old.note));
+END;
+CREATE TRIGGER IF NOT EXISTS bookmarks_au AFTER UPDATE OF title, url, folder, note ON bookmarks BEGIN
+    INSERT INTO bookmarks_fts (bookmarks_fts, rowid, title, url, folder, note)
+    VALUES ('delete', old.id, marks_fold(old.title), marks_fold(old.url), marks_fold(old.folder), marks_fold(old.note));
+    INSERT INTO bookmarks_fts (rowid, title, url, folder, note)
+    VALUES (new.id, marks_fold(new.title), marks_fold(new.url), marks_fold(new.folder), marks_fold(new.note));
+END;
+"""
+SQLITE_FTS_DROP = """
+DROP TRIGGER IF EXISTS bookmarks_ai;
+DROP TRIGGER IF EXISTS bookmarks_ad;
+DROP TRIGGER IF EXISTS bookmarks_au;
+DROP TABLE IF EXISTS bookmarks_fts;
+"""
+SQLITE_FTS_FILL = """
+INSERT INTO bookmarks_fts (rowid, title, url, folder, note)
+SELECT id, marks_fold(title), marks_fold(url), marks_fold(folder), marks_fold(note) FROM bookmarks
+"""
+
+
+def sqlite_fold(value: object) -> object:
+    return value.casefold() if isinstance(value, str) else value
+
+
+def fts_match_expression(tokens: List[str]) -> Optional[str]:
+    # The trigram tokenizer matches quoted phrases as substrings (3+ chars)
+    phrases = ['"' + token.replace('"', '""') + '"' for token in tokens if len(token) >= GRAM_SIZE]
+    return " AND ".join(phrases) if phrases else None
+
+
+def sqlite_path() -> Path:
+    if DATA_FILE.suffix.lower() in SQLITE_SUFFIXES:
+        return DATA_FILE
+    return DATA_FILE.with_suffix(".db")
+
+
+# Rows are kept in id order, which is the list order; row_ids mirrors the
+# list loaded by this process so positions in journal-style ops map to rows.
+class SqliteStore:
+    name = "sqlite"
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.row_ids: List[int] = []
+        self.has_fts = False
+        self._conn: Optional["sqlite3.Connection"] = None
+
+    @property
+    def errors(self) -> Tuple[type, ...]:
+        import sqlite3
+
+        return (OSError, sqlite3.Error)
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        if self._conn is None:
+            import sqlite3
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # The TUI uses the store from its search and autosave threads;
+            # Autosaver.lock serializes that access.
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.create_function("marks_fold", 1, sqlite_fold, deterministic=True)
+            conn.create_function("marks_canon", 1, canonical_url, deterministic=True)
+            conn.executescript(SQLITE_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(bookmarks)")}
+            if "canon" not in columns:
+                conn.execute("ALTER TABLE bookmarks ADD COLUMN canon TEXT")
+            conn.executescript(SQLITE_CANON_SCHEMA)
+            existed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'bookmarks_fts'"
+            ).fetchone()
+            (version,) = conn.execute("PRAGMA user_version").fetchone()
+            try:
+                if existed and version < SQLITE_FTS_VERSION:
+                    conn.executescript(SQLITE_FTS_DROP)  # indexed without casefolding
+                    existed = None
+                conn.executescript(SQLITE_FTS_SCHEMA)
+                if not existed:
+                    # Not 'rebuild': that would index the raw, unfolded columns.
+                    conn.execute(SQLITE_FTS_FILL)
+                    conn.execute(f"PRAGMA user_version = {SQLITE_FTS_VERSION}")
+                    conn.commit()
+                self.has_fts = True
+            except sqlite3.OperationalError:  # no FTS5 or no trigram tokenizer
+                self.has_fts = False
+            self._conn = conn
+        return self._conn
+
+    def _rows(self) -> List[Bookmark]:
+        bookmarks = []
+        self.row_ids = []
+        for row_id, title, url, folder, note in self.conn.execute(
+            "SELECT id, title, url, folder, note FROM bookmarks ORDER BY id"
+        ):
+            self.row_ids.append(row_id)
+            bookmarks.append(Bookmark(title, url, folder, note))
+        return bookmarks
+
+    def _replace_all(self, bookmarks: List[Bookmark]) -> None:
+        conn = self.conn
+        conn.execute("DELETE FROM bookmarks")
+        conn.executemany(
+            "INSERT INTO bookmarks (title, url, folder, note) VALUES (?, ?, ?, ?)",
+            [bm.as_tuple() for bm in bookmarks],
+        )
+        self.row_ids = [row_id for (row_id,) in conn.execute("SELECT id FROM bookmarks ORDER BY id")]
+
+    def load(self) -> List[Bookmark]:
+        with PROFILER.phase("load", backend=self.name) as info:
+            bookmarks = self._rows()
+            info["items"] = len(bookmarks)
+        return bookmarks
+
+    def save(self, bookmarks: List[Bookmark]) -> None:
+        with self.conn:
+            self._replace_all(bookmarks)
+
+    def rewrite(
+        self,
+        transform: Optional[Callable[[List[Bookmark]], List[Bookmark]]] = None,
+    ) -> List[Bookmark]:
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            bookmarks = self._rows()
+            if transform is not None:
+                bookmarks = transform(bookmarks)
+            self._replace_all(bookmarks)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return bookmarks
+
+    def _locate(self, position: object, old: Optional[Bookmark]) -> Optional[int]:
+        conn = self.conn
+        if isinstance(position, int) and 0 <= position < len(self.row_ids):
+            row_id = self.row_ids[position]
+            row = conn.execute(
+                "SELECT title, url, folder, note FROM bookmarks WHERE id = ?", (row_id,)
+            ).fetchone()
+            if row is not None and (old is None or tuple(row) == old.as_tuple()):
+                return row_id
+        if old is None:
+            return None
+        row = conn.execute(
+            "SELECT id FROM bookmarks WHERE title = ? AND url = ? AND folder = ? AND note = ?"
+            " ORDER BY id LIMIT 1",
+            old.as_tuple(),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _apply(self, op: Dict) -> None:
+        conn = self.conn
+        kind = op.get("op")
+        if kind == "add":
+            bookmark = clean_bookmark(op.get("bookmark"))
+            if bookmark is None:
+                return
+            position = op.get("index")
+            if isinstance(position, int) and 0 <= position < len(self.row_ids):
+                # Rows are ordered by id, so a positioned add needs a free id
+                # right after its predecessor; the id a delete freed is one.
+                row_id = (self.row_ids[position - 1] if position else 0) + 1
+                if self.row_ids[position] == row_id:
+                    self._shift_rows(position)
+                conn.execute(
+                    "INSERT INTO bookmarks (id, title, url, folder, note, canon) VALUES (?, ?, ?, ?, ?, ?)",
+                    (row_id, *bookmark.as_tuple(), canonical_url(bookmark.url)),
+                )
+                self.row_ids.insert(position, row_id)
+                return
+            cursor = conn.execute(
+                "INSERT INTO bookmarks (title, url, folder, note, canon) VALUES (?, ?, ?, ?, ?)",
+                (*bookmark.as_tuple(), canonical_url(bookmark.url)),
+            )
+            self.row_ids.append(cursor.lastrowid)
+            return
+        row_id = self._locate(op.get("index"), clean_bookmark(op.get("old")))
+        if row_id is None:
+            return
+        if kind == "delete":
+            conn.execute("DELETE FROM bookmarks WHERE id = ?", (row_id,))
+            idx = bisect_left(self.row_ids, row_id)
+            if idx < len(self.row_ids) and self.row_ids[idx] == row_id:
+                del self.row_ids[idx]
+        elif kind == "move":
+            folder = str(op.get("folder", "")).strip() or "General"
+            conn.execute("UPDATE bookmarks SET folder = ? WHERE id = ?", (folder, row_id))
+        elif kind == "edit":
+            bookmark = clean_bookmark(op.get("bookmark"))
+            if bookmark is not None:
+                conn.execute(
+                    "UPDATE bookmarks SET title = ?, url = ?, folder = ?, note = ?, canon = ? WHERE id = ?",
+                    (*bookmark.as_tuple(), canonical_url(bookmark.url), row_id),
+                )
+
+    def _shift_rows(self, position: int) -> None:
+        # Moves the rows from ``position`` on up by one id. The ids go through
+        # negative values so no update collides with a row not yet moved, and
+        # the FTS index, keyed by id, is rewritten for the moved rows.
+        conn = self.conn
+        first = self.row_ids[position]
+        if self.has_fts:
+            conn.execute(
+                "INSERT INTO bookmarks_fts (bookmarks_fts, rowid, title, url, folder, note)"
+                " SELECT 'delete', id, marks_fold(title), marks_fold(url), marks_fold(folder), marks_fold(note)"
+                " FROM bookmarks WHERE id >= ?",
+                (first,),
+            )
+        conn.execute("UPDATE bookmarks SET id = -id - 1 WHERE id >= ?", (first,))
+        conn.execute("UPDATE bookmarks SET id = -id WHERE id < 0")
+        if self.has_fts:
+            conn.execute(
+                "INSERT INTO bookmarks_fts (rowid, title, url, folder, note)"
+                " SELECT id, marks_fold(title), marks_fold(url), marks_fold(folder), marks_fold(note)"
+                " FROM bookmarks WHERE id > ?",
+                (first,),
+            )
+        for idx in range(position, len(self.row_ids)):
+            self.row_ids[idx] += 1
+
+    def commit(self, ops: List[Dict]) -> None:
+        if not ops:
+            return
+        with self.conn:
+            for op in ops:
+                self._apply(op)
+
+    def maintain(self) -> None:
+        return
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def url_lookup(self) -> Tuple[int, Callable[[str], Optional[Tuple[int, Bookmark]]]]:
+        conn = self.conn
+        with conn:
+            conn.execute("UPDATE bookmarks SET canon = marks_canon(url) WHERE canon IS NULL")
+        (size,) = conn.execute("SELECT COUNT(*) FROM bookmarks").fetchone()
+
+        def find(key: str) -> Optional[Tuple[int, Bookmark]]:
+            row = conn.execute(
+                "SELECT id, title, url, folder, note FROM bookmarks WHERE canon = ? ORDER BY id LIMIT 1", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            (position,) = conn.execute("SELECT COUNT(*) FROM bookmarks WHERE id < ?", (row[0],)).fetchone()
+            return position, Bookmark(*row[1:])
+
+        return size, find
+
+    def signature(self) -> Tuple:
+        # Committed WAL frames change the -wal file before any checkpoint.
+        wal = self.path.with_name(self.path.name + "-wal")
+        return (path_signature(self.path), path_signature(wal))
+
+    def compact(self) -> None:
+        conn = self.conn
+        if self.has_fts:
+            with conn:
+                conn.execute("INSERT INTO bookmarks_fts (bookmarks_fts) VALUES ('optimize')")
+        conn.execute("VACUUM")
+
+    def candidates(self, tokens: List[str]) -> Optional[List[int]]:
+        query = fts_match_expression(tokens)
+        conn = self.conn
+        if query is None or not self.has_fts:
+            return None
+        positions = []
+        row_ids = self.row_ids
+        for (row_id,) in conn.execute(
+            "SELECT rowid FROM bookmarks_fts WHERE bookmarks_fts MATCH ? ORDER BY rowid", (query,)
+        ):
+            idx = bisect_left(row_ids, row_id)
+            if idx < len(row_ids) and row_ids[idx] == row_id:
+                positions.append(idx)
+        return positions
+
+    def query(self, tokens: List[str], folder: Optional[str] = None) -> Iterator[Bookmark]:
+        clauses: List[str] = []
+        params: List[str] = []
+        match = fts_match_expression(tokens)
+        conn = self.conn
+        if match is not None and self.has_fts:
+            clauses.append("id IN (SELECT rowid FROM bookmarks_fts WHERE bookmarks_fts MATCH ?)")
+            params.append(match)
+        # Folders are matched by folder_key() below: NOCASE only folds ASCII.
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        wanted = folder_key(folder) if folder else None
+        for row in conn.execute(f"SELECT title, url, folder, note FROM bookmarks{where} ORDER BY id", params):
+            bm = Bookmark(*row)
+            if wanted is not None and folder_key(bm.folder) != wanted:
+                continue
+            if bookmark_matches(bm, tokens):
+                yield bm
+
+
+_STORE = None
+
+
+def open_store():
+    global _STORE
+    if _STORE is None:
+        backend = os.environ.get("MARKS_BACKEND", "").strip().lower()
+        if backend == "sqlite" or (not backend and DATA_FILE.suffix.lower() in SQLITE_SUFFIXES):
+            _STORE = SqliteStore(sqlite_path())
+        else:
+            _STORE = JsonStore()
+    return _STORE
+
+
+def load_bookmarks() -> List[Bookmark]:
+    return open_store().load()
+
+
+def save_bookmarks(bookmarks: List[Bookmark]) -> None:
+    # Replaces the whole store; prefer commit_operations() or rewrite_store(),
+    # which merge with changes made by other processes.
+    open_store().save(bookmarks)
+
+
+def rewrite_store(
+    transform: Optional[Callable[[List[Bookmark]], List[Bookmark]]] = None,
+) -> List[Bookmark]:
+    return open_store().rewrite(transform)
 
 
-def save_bookmarks(bookmarks: List[Dict[str, str]]) -> None:
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with DATA_FILE.open("w", encoding="utf-8") as fh:
-        json.dump(bookmarks, fh, indent=2)
+def commit_operations(ops: List[Dict]) -> None:
+    open_store().commit(ops)
+
+
+def compact_bookmarks() -> None:
+    open_store().compact()
+
+
+# Collects the TUI's operations and commits them from a background thread
+# every ``interval`` seconds, so key handling never waits on fsync or a
+# database write. ``lock`` serializes all access to the store; flush()
+# also runs before a backend search so its index sees every change.
+class Autosaver:
+    def __init__(self, store, interval: float = AUTOSAVE_SECONDS):
+        self.store = store
+        self.interval = interval
+        self.lock = threading.RLock()
+        self.pending: List[Dict] = []
+        self.written = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="marks-autosave", daemon=True)
+        self.thread.start()
+
+    def queue(self, op: Dict) -> None:
+        with self.lock:
+            self.pending.append(op)
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self.pending:
+                return
+            ops = self.pending
+            self.pending = []
+            try:
+                written = PROFILER.counters.get("bytes_written", 0)
+                with PROFILER.phase("save", ops=len(ops)) as info:
+                    self.store.commit(ops)
+                    info["bytes"] = PROFILER.counters.get("bytes_written", 0) - written
+            except BaseException:
+                self.pending = ops + self.pending
+                raise
+            self.written = True
+
+    def candidates(self, tokens: List[str]) -> Optional[List[int]]:
+        with self.lock:
+            self.flush()
+            return self.store.candidates(tokens)
+
+    def close(self) -> None:
+        # Final flush on quit; a session without changes writes nothing.
+        self.stopped.set()
+        self.thread.join()
+        self.flush()
+        if self.written:
+            self.store.maintain()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            try:
+                self.flush()
+            except self.store.errors:
+                continue  # kept queued; retried next interval and on quit
+
+
+# A delta is (position, old, new) with records as Bookmark.as_tuple(); old is
+# None for an add and new is None for a delete. The tuples share their
+# strings with the live bookmarks, so history costs a few pointers per change
+# no matter how large the collection is.
+Delta = Tuple[int, Optional[Tuple[str, str, str, str]], Optional[Tuple[str, str, str, str]]]
+
+
+def delta_operation(delta: Delta, reverse: bool = False) -> Dict:
+    position, old, new = delta
+    if reverse:
+        old, new = new, old
+    if old is None:
+        return {"op": "add", "index": position, "bookmark": Bookmark(*new).to_dict()}
+    if new is None:
+        return {"op": "delete", "index": position, "old": Bookmark(*old).to_dict()}
+    return {"op": "edit", "index": position, "old": Bookmark(*old).to_dict(), "bookmark": Bookmark(*new).to_dict()}
+
+
+# Undo/redo stacks of delta groups; one group per user action (or import).
+class UndoLog:
+    def __init__(self, limit: int = UNDO_LIMIT):
+        self.limit = limit
+        self.done: List[List[Delta]] = []
+        self.undone: List[List[Delta]] = []
+
+    def record(self, deltas: List[Delta]) -> None:
+        if not deltas:
+            return
+        self.done.append(deltas)
+        del self.done[: -self.limit]
+        self.undone = []
+
+    def undo(self) -> List[Dict]:
+        if not self.done:
+            return []
+        group = self.done.pop()
+        self.undone.append(group)
+        return [delta_operation(delta, reverse=True) for delta in reversed(group)]
+
+    def redo(self) -> List[Dict]:
+        if not self.undone:
+            return []
+        group = self.undone.pop()
+        self.done.append(group)
+        return [delta_operation(delta) for delta in group]
+
+
+# Streams the undo group of an import to a temp file next to UNDO_FILE, so
+# it takes no memory however large the import; save() moves it into place.
+class UndoSpool:
+    def __init__(self) -> None:
+        UNDO_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(prefix=f".{UNDO_FILE.name}.", suffix=".tmp", dir=UNDO_FILE.parent)
+        self.path = Path(name)
+        self.fh = os.fdopen(fd, "w", encoding="utf-8")
+        self.count = 0
+
+    def append(self, delta: Delta) -> None:
+        self.fh.write(json.dumps(delta, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def save(self) -> None:
+        # An import that changed nothing still replaces the previous group, so
+        # --undo-import never reaches back past the last run.
+        self.fh.flush()
+        os.fsync(self.fh.fileno())
+        self.fh.close()
+        if not self.count:
+            self.path.unlink(missing_ok=True)
+            UNDO_FILE.unlink(missing_ok=True)
+            return
+        os.replace(self.path, UNDO_FILE)
+
+    def discard(self) -> None:
+        self.fh.close()
+        self.path.unlink(missing_ok=True)
+
+
+def load_undo_group() -> List[Delta]:
+    deltas: List[Delta] = []
+    try:
+        with UNDO_FILE.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                position, old, new = json.loads(line)
+                deltas.append((position, tuple(old) if old else None, tuple(new) if new else None))
+    except FileNotFoundError:
+        return []
+    except (ValueError, TypeError) as exc:
+        raise StorageError(f"{UNDO_FILE} is not a valid undo file ({exc}).") from exc
+    return deltas
 
 
 def load_config() -> Dict[str, int]:
@@ -99,24 +1229,129 @@ def load_config() -> Dict[str, int]:
 
 
 def save_config(config: Dict[str, int]) -> None:
-    CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with CONFIG_FILE.open("w", encoding="utf-8") as fh:
-        json.dump(config, fh, indent=2)
+    atomic_write(CONFIG_FILE, json.dumps(config, indent=2).encode("utf-8"))
 
 
-def make_bookmark(title: str, url: str, folder: str = "General", note: str = "") -> Dict[str, str]:
-    cleaned_title = (title or "").strip()
+def make_bookmark(title: str, url: str, folder: str = "General", note: str = "") -> Bookmark:
     cleaned_url = (url or "").strip()
-    if not cleaned_title or not cleaned_url:
-        raise ValueError("Title and URL are required.")
+    if not cleaned_url:
+        raise ValueError("URL is required.")
+    # A bare URL is titled with itself until --enrich fetches the page title.
+    cleaned_title = (title or "").strip() or cleaned_url
     cleaned_folder = (folder or "General").strip() or "General"
     cleaned_note = (note or "").strip()
-    return {
-        "title": cleaned_title,
-        "url": cleaned_url,
-        "folder": cleaned_folder,
-        "note": cleaned_note,
-    }
+    return Bookmark(cleaned_title, cleaned_url, cleaned_folder, cleaned_note)
+
+
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "yclid", "_ga"}
+DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21}
+
+
+def canonical_url(url: str) -> str:
+    cleaned = (url or "").strip()
+    try:
+        parts = urlsplit(cleaned)
+        port = parts.port
+    except ValueError:
+        return cleaned
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if not scheme or not host:
+        return cleaned
+    netloc = f"[{host}]" if ":" in host else host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        netloc = f"{userinfo}@{netloc}"
+    path = parts.path.rstrip("/") or "/"
+    params = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(params)), parts.fragment))
+
+
+# Canonical URL -> (position, bookmark) for everything admitted so far. The
+# store answers for the rest from its persistent URL index (url_lookup()),
+# so a check never canonicalizes the whole store. The deltas go to a list
+# unless ``deltas`` is another sink with append(), such as an UndoSpool.
+class UrlIndex:
+    def __init__(self, store, allow_duplicates: bool = False, deltas=None):
+        self.allow_duplicates = allow_duplicates
+        self.seen: Dict[str, Tuple[int, Bookmark]] = {}
+        self.lookup: Optional[Callable[[str], Optional[Tuple[int, Bookmark]]]] = None
+        self.size = 0
+        self.added = 0
+        self.merged = 0
+        self.skipped = 0
+        self.deltas = [] if deltas is None else deltas
+        if not allow_duplicates:
+            self.size, self.lookup = store.url_lookup()
+
+    def _existing(self, key: str) -> Optional[Tuple[int, Bookmark]]:
+        found = self.seen.get(key)
+        if found is None and self.lookup is not None:
+            found = self.lookup(key)
+            if found is not None:
+                self.seen[key] = found
+        return found
+
+    def find(self, url: str) -> Optional[Bookmark]:
+        found = self._existing(canonical_url(url))
+        return found[1] if found else None
+
+    def admit(self, bookmark: Bookmark) -> List[Dict]:
+        key = canonical_url(bookmark.url)
+        existing = None if self.allow_duplicates else self._existing(key)
+        if existing is None:
+            if not self.allow_duplicates:
+                self.seen[key] = (self.size, bookmark)
+            # Without the store loaded (duplicates allowed) the position is
+            # unknown; undo then finds the bookmark by content.
+            self.deltas.append((-1 if self.allow_duplicates else self.size, None, bookmark.as_tuple()))
+            self.size += 1
+            self.added += 1
+            return [{"op": "add", "bookmark": bookmark.to_dict()}]
+        position, current = existing
+        merged = merge_bookmarks(current, bookmark)
+        if merged == current:
+            self.skipped += 1
+            return []
+        self.seen[key] = (position, merged)
+        self.deltas.append((position, current.as_tuple(), merged.as_tuple()))
+        self.merged += 1
+        return [{"op": "edit", "index": position, "old": current.to_dict(), "bookmark": merged.to_dict()}]
+
+    def summary(self) -> str:
+        parts = []
+        if self.merged:
+            parts.append(f"{self.merged} merged")
+        if self.skipped:
+            parts.append(f"{self.skipped} duplicates skipped")
+        return f" ({', '.join(parts)})" if parts else ""
+
+
+def merge_bookmarks(kept: Bookmark, duplicate: Bookmark) -> Bookmark:
+    # The first copy wins; a note only the duplicate carries is appended.
+    if duplicate.note and duplicate.note not in kept.note:
+        return kept.replace(note=f"{kept.note}; {duplicate.note}" if kept.note else duplicate.note)
+    return kept
+
+
+def dedupe_bookmarks(bookmarks: List[Bookmark]) -> List[Bookmark]:
+    kept: List[Bookmark] = []
+    positions: Dict[str, int] = {}
+    for bm in bookmarks:
+        key = canonical_url(bm.url)
+        position = positions.get(key)
+        if position is None:
+            positions[key] = len(kept)
+            kept.append(bm)
+        else:
+            kept[position] = merge_bookmarks(kept[position], bm)
+    return kept
 
 
 def clamp(value: int, lower: int, upper: int) -> int:
@@ -238,16 +1473,12 @@ def draw_box(stdscr, top: int, left: int, height: int, width: int, attr: int = c
         stdscr.addch(y, right, curses.ACS_VLINE, attr)
 
 
-def gather_folders(bookmarks: List[Dict[str, str]]) -> List[str]:
-    folders = sorted({bm.get("folder", "General") or "General" for bm in bookmarks})
-    return folders or ["General"]
-
-
 def prompt_input(
     stdscr,
     prompt: str,
     default: str = "",
-    on_change: Optional[Callable[[str], None]] = None,
+    on_change: Optional[Callable[[str], Optional[bool]]] = None,
+    debounce: float = 0.0,
 ) -> str:
     curses.curs_set(1)
     h, w = stdscr.getmaxyx()
@@ -266,10 +1497,11 @@ def prompt_input(
     pos = len(buf)
     view_start = 0
     changed = True
+    pending = False  # on_change asked to be called again (search still running)
 
     while True:
-        if changed and on_change is not None:
-            on_change("".join(buf))
+        if (changed or pending) and on_change is not None:
+            pending = bool(on_change("".join(buf)))
         for y in (label_y, input_y):
             stdscr.move(y, 0)
             stdscr.clrtoeol()
@@ -292,40 +1524,60 @@ def prompt_input(
         stdscr.move(input_y, cursor_col)
         stdscr.refresh()
 
+        stdscr.timeout(SEARCH_POLL_MS if pending else -1)
         ch = stdscr.getch()
+        stdscr.timeout(-1)
         changed = False
-        if ch in (curses.ascii.LF, curses.ascii.CR, curses.KEY_ENTER):
-            break
-        if ch in (27,):  # ESC cancels
-            buf = []
-            changed = True
-            break
-        if ch in (curses.KEY_LEFT, curses.ascii.STX):
-            pos = max(0, pos - 1)
-            continue
-        if ch in (curses.KEY_RIGHT, curses.ascii.ACK):
-            pos = min(len(buf), pos + 1)
-            continue
-        if ch in (curses.KEY_BACKSPACE, curses.ascii.BS, curses.ascii.DEL, 127):
-            if pos > 0:
-                buf.pop(pos - 1)
-                pos -= 1
+        finished = False
+        while ch != -1:
+            if ch in (curses.ascii.LF, curses.ascii.CR, curses.KEY_ENTER):
+                finished = True
+                break
+            if ch in (27,):  # ESC cancels
+                buf = []
                 changed = True
-            continue
-        if curses.ascii.isprint(ch):
-            buf.insert(pos, chr(ch))
-            pos += 1
-            changed = True
+                finished = True
+                break
+            if ch in (curses.KEY_LEFT, curses.ascii.STX):
+                pos = max(0, pos - 1)
+            elif ch in (curses.KEY_RIGHT, curses.ascii.ACK):
+                pos = min(len(buf), pos + 1)
+            elif ch in (curses.KEY_BACKSPACE, curses.ascii.BS, curses.ascii.DEL, 127):
+                if pos > 0:
+                    buf.pop(pos - 1)
+                    pos -= 1
+                    changed = True
+            elif curses.ascii.isprint(ch):
+                buf.insert(pos, chr(ch))
+                pos += 1
+                changed = True
+            # Take every key that is already queued (a paste, fast typing)
+            # and, while the text keeps changing, wait up to ``debounce``
+            # seconds for more, so on_change runs once per burst.
+            wait = debounce if changed and on_change is not None else 0.0
+            stdscr.timeout(int(wait * 1000))
+            ch = stdscr.getch()
+            stdscr.timeout(-1)
+        if finished:
+            break
 
     curses.curs_set(0)
     return "".join(buf).strip()
 
 
-def folder_picker(stdscr, options: List[str], initial_idx: int) -> str:
+def folder_picker(
+    stdscr,
+    options: List[str],
+    initial_idx: int,
+    counts: Optional[Dict[str, int]] = None,
+) -> str:
     if not options:
         return ""
+    counts = counts or {}
+    labels = {folder: str(counts[folder]) for folder in options if folder in counts}
+    count_width = max((len(label) for label in labels.values()), default=0)
     h, w = stdscr.getmaxyx()
-    width = min(w - 2, max(len(f) for f in options) + 4)
+    width = min(w - 2, max(len(f) for f in options) + 4 + (count_width + 1 if count_width else 0))
     height = min(len(options) + 2, h - 2)
     starty = max(0, h - height - 2)
     startx = 2
@@ -344,7 +1596,9 @@ def folder_picker(stdscr, options: List[str], initial_idx: int) -> str:
         win.box()
         for i, folder in enumerate(options[: height - 2]):
             attr = highlight_attr if i == idx else curses.A_NORMAL
-            win.addnstr(1 + i, 1, folder.ljust(width - 2), width - 2, attr)
+            label = labels.get(folder, "").rjust(count_width)
+            line = folder[: max(0, width - 3 - len(label))].ljust(width - 2 - len(label)) + label
+            win.addnstr(1 + i, 1, line, width - 2, attr)
         win.refresh()
 
         ch = win.getch()
@@ -358,8 +1612,8 @@ def folder_picker(stdscr, options: List[str], initial_idx: int) -> str:
             return options[initial_idx]
 
 
-def prompt_folder(stdscr, bookmarks: List[Dict[str, str]], default: str) -> str:
-    folders = gather_folders(bookmarks)
+def prompt_folder(stdscr, index: "BookmarkIndex", default: str) -> str:
+    folders = index.folders()
     current_default = default or "General"
     options = ["<Add new>"] + folders
     try:
@@ -367,7 +1621,7 @@ def prompt_folder(stdscr, bookmarks: List[Dict[str, str]], default: str) -> str:
     except ValueError:
         initial_idx = 0
 
-    choice = folder_picker(stdscr, options, initial_idx)
+    choice = folder_picker(stdscr, options, initial_idx, index.folder_counts())
     if choice == "<Add new>":
         new_val = prompt_input(stdscr, "Folder", "")
         return new_val or current_default
@@ -380,13 +1634,653 @@ def normalize_search(query: str) -> List[str]:
     cleaned = query.strip()
     while cleaned.startswith("/"):
         cleaned = cleaned[1:]
-    tokens = [t for t in cleaned.split() if t]
+    tokens = [t for t in cleaned.casefold().split() if t]
     return tokens
 
 
-def draw_ui(
-    stdscr,
-    display_items: List[Tuple[int, Dict[str, str]]],
+def search_text(bookmark: Bookmark) -> str:
+    return " ".join(getattr(bookmark, field).casefold() for field in SEARCH_FIELDS)
+
+
+def bookmark_matches(bookmark: Bookmark, tokens: List[str]) -> bool:
+    if not tokens:
+        return True
+    haystack = search_text(bookmark)
+    return all(token in haystack for token in tokens)
+
+
+def folder_key(folder: str) -> str:
+    return (folder or "General").casefold()
+
+
+def index_words(text: str) -> Set[str]:
+    # Numbers (ids, dates, ports) make up most distinct words and are cheap to
+    # find by scanning, so they stay out of the index.
+    return {word for word in WORD_RE.findall(text) if len(word) >= GRAM_SIZE and not word.isdigit()}
+
+
+# Inverted index for the TUI search: each word maps to the one bookmark id
+# holding it or to an array of ids. A substring token is resolved against all
+# words at once by searching a single NUL-joined copy of the vocabulary. The
+# word index is built INDEX_BUILD_CHUNK bookmarks at a time by build_step()
+# (the search worker runs it while idle); until then candidate_positions()
+# returns every position and narrow() scans. A backend with its own
+# full-text index can supply ``candidates`` instead. Ids
+# increase in list order, which keeps ``ids`` sorted for position lookups;
+# they are spaced ID_STRIDE apart so insert() can slot one in between.
+# The casefolded search text and folder key of every bookmark are cached per
+# id and only recomputed when that bookmark changes. Folders map to their
+# member ids and the folder names are kept sorted as they come and go.
+class BookmarkIndex:
+
+    def __init__(
+        self,
+        bookmarks: List[Bookmark],
+        candidates: Optional[Callable[[List[str]], Optional[List[int]]]] = None,
+    ):
+        self.bookmarks = bookmarks
+        self.candidates = candidates
+        self.ids: List[int] = []
+        self.text: Dict[int, str] = {}
+        self.folder_keys: Dict[int, str] = {}
+        self.folder_of: Dict[int, str] = {}
+        self.folder_members: Dict[str, Set[int]] = {}
+        self.folder_names: List[str] = []
+        self._folder_cache: Dict[str, List[int]] = {}
+        self._folder_cache_generation = 0
+        self.postings: Dict[str, object] = {}  # word -> id or array("I") of ids
+        self.vocab: List[str] = []
+        self._vocab_text = ""
+        self._vocab_starts = array("I")
+        self.generation = 0
+        self._next_id = 0
+        self._indexing = False
+        for bookmark in bookmarks:
+            self._append_id(bookmark)
+        # Bookmarks added from here on are indexed as they come.
+        self._indexing = candidates is None
+        self.built = not self._indexing
+        self._build_queue = [] if self.built else list(self.ids)
+        self._build_pos = 0
+        self._unindexed: Set[int] = set(self._build_queue)
+
+    def _append_id(self, bookmark: Bookmark) -> None:
+        doc_id = self._next_id
+        self._next_id += ID_STRIDE
+        self.ids.append(doc_id)
+        self._add_words(doc_id, bookmark)
+
+    def _add_words(self, doc_id: int, bookmark: Bookmark) -> None:
+        text = search_text(bookmark)
+        self.text[doc_id] = text
+        folder = bookmark.folder or "General"
+        self.folder_keys[doc_id] = folder_key(folder)
+        self.folder_of[doc_id] = folder
+        members = self.folder_members.get(folder)
+        if members is None:
+            members = self.folder_members[folder] = set()
+            insort(self.folder_names, folder)
+        members.add(doc_id)
+        if self._indexing:
+            self._index(doc_id, text)
+
+    def _index(self, doc_id: int, text: str) -> None:
+        postings = self.postings
+        for word in index_words(text):
+            docs = postings.get(word)
+            if docs is None:
+                postings[word] = doc_id
+                self.vocab.append(word)
+            elif type(docs) is int:
+                postings[word] = array("I", (docs, doc_id))
+            else:
+                docs.append(doc_id)
+
+    def _unindex(self, doc_id: int, text: str) -> None:
+        # Words stay in the vocabulary with an empty array once unused.
+        postings = self.postings
+        for word in index_words(text):
+            docs = postings[word]
+            if type(docs) is int:
+                postings[word] = array("I")
+            else:
+                docs.remove(doc_id)
+
+    def build_step(self, limit: int = 0) -> bool:
+        # Indexes up to ``limit`` more bookmarks (all when 0); True when done.
+        if self.built:
+            return True
+        queue = self._build_queue
+        end = len(queue) if not limit else min(len(queue), self._build_pos + limit)
+        for doc_id in queue[self._build_pos : end]:
+            if doc_id in self._unindexed:
+                self._unindexed.discard(doc_id)
+                self._index(doc_id, self.text[doc_id])
+        self._build_pos = end
+        if end == len(queue):
+            self.built = True
+            self._unindexed = set()
+            self._build_queue = []
+        return self.built
+
+    def _drop_words(self, doc_id: int) -> None:
+        text = self.text.pop(doc_id, None)
+        if doc_id in self._unindexed:
+            self._unindexed.discard(doc_id)
+        elif self._indexing and text is not None:
+            self._unindex(doc_id, text)
+        self.folder_keys.pop(doc_id, None)
+        folder = self.folder_of.pop(doc_id, None)
+        if folder is not None:
+            members = self.folder_members[folder]
+            members.discard(doc_id)
+            if not members:
+                del self.folder_members[folder]
+                del self.folder_names[bisect_left(self.folder_names, folder)]
+
+    def add(self, bookmark: Bookmark) -> int:
+        self.bookmarks.append(bookmark)
+        self._append_id(bookmark)
+        self.generation += 1
+        return len(self.bookmarks) - 1
+
+    def insert(self, position: int, bookmark: Bookmark) -> int:
+        if position >= len(self.bookmarks):
+            return self.add(bookmark)
+        # Ids are unsigned (the postings are array("I")), so -1 bounds the top.
+        low = self.ids[position - 1] if position else -1
+        if self.ids[position] - low < 2:
+            self._renumber(position)
+            low = self.ids[position - 1] if position else -1
+        doc_id = (low + self.ids[position]) // 2
+        self.bookmarks.insert(position, bookmark)
+        self.ids.insert(position, doc_id)
+        self._add_words(doc_id, bookmark)
+        self.generation += 1
+        return position
+
+    def _renumber(self, position: int) -> None:
+        # Respaces the ids around ``position`` only: the window doubles until
+        # its ids are ID_RESPACE_GAP apart on average (or it reaches the end
+        # of the list, where ids are unbounded), so the cost stays local.
+        ids = self.ids
+        size = 1
+        while True:
+            lo = max(0, position - size)
+            hi = min(len(ids), position + size)
+            low = ids[lo - 1] if lo else -1
+            if hi == len(ids):
+                gap = ID_STRIDE
+                break
+            gap = (ids[hi] - low) // (hi - lo + 1)
+            if gap >= ID_RESPACE_GAP:
+                break
+            size *= 2
+        # Drop every old id before adding the new ones; they may overlap.
+        for doc_id in ids[lo:hi]:
+            self._drop_words(doc_id)
+        for offset in range(hi - lo):
+            ids[lo + offset] = low + gap * (offset + 1)
+            self._add_words(ids[lo + offset], self.bookmarks[lo + offset])
+        if hi == len(ids):
+            self._next_id = ids[-1] + ID_STRIDE
+
+    def update(self, position: int, bookmark: Optional[Bookmark] = None) -> None:
+        if bookmark is not None:
+            self.bookmarks[position] = bookmark
+        doc_id = self.ids[position]
+        self._drop_words(doc_id)
+        self._add_words(doc_id, self.bookmarks[position])
+        self.generation += 1
+
+    def remove(self, position: int) -> Bookmark:
+        self._drop_words(self.ids.pop(position))
+        self.generation += 1
+        return self.bookmarks.pop(position)
+
+    def folder_key(self, position: int) -> str:
+        return self.folder_keys[self.ids[position]]
+
+    def position_text(self, position: int) -> str:
+        return self.text[self.ids[position]]
+
+    def folders(self) -> List[str]:
+        return list(self.folder_names) or ["General"]
+
+    def folder_counts(self) -> Dict[str, int]:
+        return {folder: len(members) for folder, members in self.folder_members.items()}
+
+    def folder_positions(self, folder: str) -> List[int]:
+        if self._folder_cache_generation != self.generation:
+            self._folder_cache = {}
+            self._folder_cache_generation = self.generation
+        wanted = folder_key(folder)
+        cached = self._folder_cache.get(wanted)
+        if cached is not None:
+            return cached
+        doc_ids: List[int] = []
+        for name, members in self.folder_members.items():
+            if folder_key(name) == wanted:
+                doc_ids.extend(members)
+        doc_ids.sort()
+        positions = [bisect_left(self.ids, doc_id) for doc_id in doc_ids]
+        self._folder_cache[wanted] = positions
+        return positions
+
+    def _lookup(self, piece: str, limit: int) -> Optional[Set[int]]:
+        # Ids of bookmarks with a word containing ``piece``; None once more
+        # than ``limit`` match, where scanning is as cheap as the index.
+        vocab = self.vocab
+        starts = self._vocab_starts
+        if len(starts) < len(vocab):
+            # New words only ever append, so the joined text just grows.
+            fresh = vocab[len(starts) :]
+            parts = [self._vocab_text] + fresh if starts else fresh
+            offset = len(self._vocab_text) + 1 if starts else 0
+            for word in fresh:
+                starts.append(offset)
+                offset += len(word) + 1
+            self._vocab_text = "\0".join(parts)
+        text = self._vocab_text
+        postings = self.postings
+        docs: Set[int] = set()
+        last = -1
+        at = text.find(piece)
+        while at >= 0:
+            word_no = bisect_right(starts, at) - 1
+            if word_no != last:
+                last = word_no
+                found = postings[vocab[word_no]]
+                if type(found) is int:
+                    docs.add(found)
+                else:
+                    docs.update(found)
+                if len(docs) > limit:
+                    return None
+            # Continue after this word; later hits in it add nothing.
+            at = text.find(piece, starts[word_no + 1] if word_no + 1 < len(starts) else len(text))
+        return docs
+
+    def search(self, tokens: List[str]) -> List[int]:
+        if not tokens:
+            return list(range(len(self.bookmarks)))
+        return self.narrow(self.candidate_positions(tokens), tokens)
+
+    def candidate_positions(self, tokens: List[str]) -> List[int]:
+        # Positions that may match; narrow() makes the final check.
+        if self.candidates is not None:
+            found = self.candidates(tokens)
+            return list(range(len(self.bookmarks))) if found is None else found
+        if not self.built:
+            return list(range(len(self.bookmarks)))
+        limit = len(self.bookmarks) // INDEX_SCAN_SHARE
+        candidates: Optional[Set[int]] = None
+        for token in tokens:
+            for piece in WORD_RE.findall(token):
+                if len(piece) < GRAM_SIZE or piece.isdigit():
+                    continue
+                found = self._lookup(piece, limit)
+                if found is None:
+                    continue
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    return []
+        if candidates is None:
+            return list(range(len(self.bookmarks)))
+        return [bisect_left(self.ids, doc_id) for doc_id in sorted(candidates)]
+
+    def narrow(self, positions: List[int], tokens: List[str]) -> List[int]:
+        ids = self.ids
+        text = self.text
+        matches = []
+        for position in positions:
+            haystack = text[ids[position]]
+            if all(token in haystack for token in tokens):
+                matches.append(position)
+        return matches
+
+
+# Keeps one result list per query prefix while the user types. Extending the
+# query only narrows the previous hits; shortening it pops back to the cached
+# result. Any change to the index invalidates the stack.
+class SearchSession:
+    def __init__(self, index: BookmarkIndex):
+        self.index = index
+        self.stack: List[Tuple[str, List[int]]] = []
+        self.fuzzy_stack: List[Tuple[str, List[Tuple[int, int]]]] = []
+        self.fuzzy_folder = ""
+        self.generation = index.generation
+        self.scanned = 0  # candidates checked so far, for the profiler
+
+    def _check_generation(self) -> None:
+        if self.generation != self.index.generation:
+            self.stack = []
+            self.fuzzy_stack = []
+            self.generation = self.index.generation
+
+    def search(self, query: str) -> List[int]:
+        results: List[int] = []
+        for part in self.search_chunks(query):
+            results.extend(part)
+        return results
+
+    def search_chunks(self, query: str, chunk: int = 0) -> Iterator[List[int]]:
+        # Yields the hits ``chunk`` candidates at a time (all at once when 0);
+        # the result is only cached once the generator runs to the end.
+        self._check_generation()
+        while self.stack and not query.startswith(self.stack[-1][0]):
+            self.stack.pop()
+        if self.stack and self.stack[-1][0] == query:
+            yield self.stack[-1][1]
+            return
+        tokens = normalize_search(query)
+        if not tokens:
+            yield list(range(len(self.index.bookmarks)))
+            return
+        if self.stack:
+            positions = self.stack[-1][1]
+        else:
+            positions = self.index.candidate_positions(tokens)
+        step = chunk or max(1, len(positions))
+        results: List[int] = []
+        for start in range(0, len(positions), step):
+            part = positions[start : start + step]
+            self.scanned += len(part)
+            found = self.index.narrow(part, tokens)
+            results.extend(found)
+            yield found
+        self.stack.append((query, results))
+
+    def fuzzy(self, query: str, limit: Optional[int], folder: str = "") -> List[int]:
+        tokens = normalize_search(query)
+        if not tokens:
+            return self._universe(folder)
+        for _ in self.fuzzy_chunks(query, folder):
+            pass
+        index = self.index
+        return fuzzy_top(index.bookmarks, self.fuzzy_stack[-1][1], tokens, limit, index.position_text)
+
+    def fuzzy_chunks(self, query: str, folder: str = "", chunk: int = 0) -> Iterator[List[int]]:
+        # Same prefix stack as search(): a longer query keeps every token's
+        # characters in order, so it can only drop earlier matches. Chunks
+        # come in list order; fuzzy() ranks the finished match list.
+        self._check_generation()
+        index = self.index
+        if folder != self.fuzzy_folder:
+            self.fuzzy_stack = []
+            self.fuzzy_folder = folder
+        tokens = normalize_search(query)
+        if not tokens:
+            yield self._universe(folder)
+            return
+        while self.fuzzy_stack and not query.startswith(self.fuzzy_stack[-1][0]):
+            self.fuzzy_stack.pop()
+        if self.fuzzy_stack and self.fuzzy_stack[-1][0] == query:
+            yield [-neg for _, neg in self.fuzzy_stack[-1][1]]
+            return
+        if self.fuzzy_stack:
+            positions = [-neg for _, neg in self.fuzzy_stack[-1][1]]
+        else:
+            positions = self._universe(folder)
+        step = chunk or max(1, len(positions))
+        matches: List[Tuple[int, int]] = []
+        for start in range(0, len(positions), step):
+            part = positions[start : start + step]
+            self.scanned += len(part)
+            found = fuzzy_matches(index.bookmarks, iter(part), tokens, index.position_text)
+            matches.extend(found)
+            yield [-neg for _, neg in found]
+        self.fuzzy_stack.append((query, matches))
+
+    def _universe(self, folder: str) -> List[int]:
+        index = self.index
+        return list(index.folder_positions(folder)) if folder else list(range(len(index.bookmarks)))
+
+
+# Runs SearchSession queries on a daemon thread so the curses loop keeps
+# taking keys. Hits are published chunk by chunk; submitting a new query
+# abandons the running one at the next chunk boundary. ``lock`` guards the
+# index: the worker holds it per chunk and the UI holds it while it changes
+# bookmarks. A job also stops when the index generation moves under it. A
+# job that raises ends as done with ``error`` set; the thread lives on.
+class SearchWorker:
+    def __init__(self, session: SearchSession, chunk: int = SEARCH_CHUNK):
+        self.session = session
+        self.chunk = chunk
+        self.lock = threading.Lock()
+        self.cond = threading.Condition()
+        self.serial = 0
+        self.key: Optional[Tuple] = None
+        self.job: Optional[Tuple] = None
+        self.hits: List[int] = []
+        self.done = False
+        self.error: Optional[str] = None
+        threading.Thread(target=self._run, name="marks-search", daemon=True).start()
+
+    def results(self, key: Tuple, wait: float = 0.0) -> Tuple[List[int], bool]:
+        # ``key`` is (fuzzy, query, folder, generation).
+        with self.cond:
+            if key != self.key:
+                self.serial += 1
+                self.key = key
+                self.job = (self.serial,) + key
+                self.hits = []
+                self.done = False
+                self.error = None
+                self.cond.notify_all()
+            if wait and not self.done:
+                serial = self.serial
+                self.cond.wait_for(lambda: self.done or self.serial != serial, wait)
+            return list(self.hits), self.done
+
+    def _run(self) -> None:
+        session = self.session
+        while True:
+            with self.cond:
+                if session.index.built:
+                    self.cond.wait_for(lambda: self.job is not None)
+                job, self.job = self.job, None
+            if job is None:
+                # Idle: index another slice; searches scan until it is built.
+                with self.lock:
+                    session.index.build_step(INDEX_BUILD_CHUNK)
+                continue
+            serial, fuzzy, query, folder, generation = job
+            started = time.perf_counter()
+            scanned = session.scanned
+            hits: List[int] = []
+            finished = False
+            try:
+                if fuzzy:
+                    chunks = session.fuzzy_chunks(query, folder, self.chunk)
+                else:
+                    chunks = session.search_chunks(query, self.chunk)
+                while True:
+                    with self.lock:
+                        if self.serial != serial or session.index.generation != generation:
+                            break
+                        part = next(chunks, None)
+                    with self.cond:
+                        if self.serial != serial:
+                            break
+                        if part is None:
+                            self.done = True
+                            finished = True
+                            self.cond.notify_all()
+                            break
+                        hits.extend(part)
+                        self.hits = hits
+                        self.cond.notify_all()
+            except Exception as exc:  # a failed search must not kill the worker
+                with self.cond:
+                    if self.serial == serial:
+                        self.error = f"Search failed: {exc}"
+                        self.done = True
+                        self.cond.notify_all()
+            if PROFILER.enabled:
+                scanned = session.scanned - scanned
+                PROFILER.count("items_scanned", scanned)
+                PROFILER.record(
+                    "search",
+                    time.perf_counter() - started,
+                    query=query,
+                    fuzzy=fuzzy,
+                    hits=len(hits),
+                    scanned=scanned,
+                    finished=finished,
+                )
+
+
+def fuzzy_query(query: str) -> Optional[str]:
+    cleaned = query.strip().lstrip("/")
+    if not cleaned.startswith(FUZZY_PREFIX):
+        return None
+    return cleaned[len(FUZZY_PREFIX) :]
+
+
+def fuzzy_patterns(tokens: List[str]) -> List[Tuple["re.Pattern[str]", int]]:
+    # "a[^b]*b[^c]*c" finds the same span as a lazy "a.*?b.*?c" without the
+    # backtracking when a bookmark does not match.
+    patterns = []
+    for token in tokens:
+        parts = [re.escape(token[0])]
+        for ch in token[1:]:
+            escaped = re.escape(ch)
+            parts.append(f"[^{escaped}]*{escaped}")
+        patterns.append((re.compile("".join(parts)), len(token)))
+    return patterns
+
+
+def fuzzy_score(token: str, text: str) -> Optional[int]:
+    # fzf-style: find the first subsequence, shrink it to the shortest window
+    # ending at the same place, then score that window.
+    end = -1
+    for ch in token:
+        end = text.find(ch, end + 1)
+        if end < 0:
+            return None
+    start = end + 1
+    for ch in reversed(token):
+        start = text.rfind(ch, 0, start)
+    score = 0
+    prev = start - 1
+    for i, ch in enumerate(token):
+        pos = text.find(ch, prev + 1)
+        if i and pos == prev + 1:
+            score += FUZZY_CONSECUTIVE
+        elif i:
+            score += FUZZY_GAP_START + FUZZY_GAP_EXTENSION * (pos - prev - 2)
+        if pos == 0 or not text[pos - 1].isalnum():
+            score += FUZZY_BOUNDARY * (2 if i == 0 else 1)
+        score += FUZZY_MATCH
+        prev = pos
+    return score
+
+
+def fuzzy_coarse(patterns: List[Tuple["re.Pattern[str]", int]], title: str, text: str) -> Optional[int]:
+    # Cheap estimate from the regex span: tight spans and title hits first.
+    score = 0
+    for pattern, size in patterns:
+        found = pattern.search(title)
+        if found is not None:
+            score += FUZZY_TITLE_BONUS
+        else:
+            found = pattern.search(text)
+            if found is None:
+                return None
+        score -= found.end() - found.start() - size
+    return score
+
+
+def fuzzy_rank_score(tokens: List[str], title: str, text: str) -> int:
+    score = 0
+    for token in tokens:
+        found = fuzzy_score(token, title)
+        if found is not None:
+            score += found + FUZZY_TITLE_BONUS
+        else:
+            score += fuzzy_score(token, text) or 0
+    return score
+
+
+def fuzzy_matches(
+    bookmarks: List[Bookmark],
+    positions: Iterator[int],
+    tokens: List[str],
+    text_of: Optional[Callable[[int], str]] = None,
+) -> List[Tuple[int, int]]:
+    if text_of is None:
+        text_of = lambda position: search_text(bookmarks[position])
+    patterns = fuzzy_patterns(tokens)
+    matches = []
+    for position in positions:
+        coarse = fuzzy_coarse(patterns, bookmarks[position].title.casefold(), text_of(position))
+        if coarse is not None:
+            matches.append((coarse, -position))
+    return matches
+
+
+def fuzzy_top(
+    bookmarks: List[Bookmark],
+    matches: List[Tuple[int, int]],
+    tokens: List[str],
+    limit: Optional[int],
+    text_of: Optional[Callable[[int], str]] = None,
+) -> List[int]:
+    # Only the best ``limit`` coarse hits (plus a margin) get the full score
+    # and a sort; the remaining matches follow in list order.
+    if text_of is None:
+        text_of = lambda position: search_text(bookmarks[position])
+    if limit is None or limit + FUZZY_MARGIN >= len(matches):
+        head = matches
+    else:
+        head = heapq.nlargest(limit + FUZZY_MARGIN, matches)
+    ranked = sorted(
+        (-fuzzy_rank_score(tokens, bookmarks[-neg].title.casefold(), text_of(-neg)), -neg)
+        for _, neg in head
+    )
+    order = [position for _, position in ranked]
+    if len(head) < len(matches):
+        chosen = set(order)
+        order.extend(-neg for _, neg in matches if -neg not in chosen)
+    return order
+
+# What draw_ui last put on screen, region by region, so a frame only rewrites
+# the lines whose content changed and the terminal receives just those. Row
+# strings are cached per list width. Anything else that draws on stdscr
+# (prompts, pickers, the settings screen) has to be followed by invalidate().
+class FrameCache:
+    ROW_CACHE_LIMIT = 4096
+
+    def __init__(self) -> None:
+        self.regions: Dict[object, object] = {}
+        self.rows: Dict[int, Tuple[str, str, str]] = {}
+        self.row_width = 0
+
+    def invalidate(self) -> None:
+        self.regions = {}
+
+    def changed(self, region: object, content: object) -> bool:
+        if self.regions.get(region) == content:
+            return False
+        self.regions[region] = content
+        return True
+
+    def row(self, absolute_idx: int, bookmark: Bookmark, width: int) -> str:
+        if width != self.row_width or len(self.rows) > self.ROW_CACHE_LIMIT:
+            self.rows = {}
+            self.row_width = width
+        cached = self.rows.get(absolute_idx)
+        if cached is not None and cached[0] == bookmark.folder and cached[1] == bookmark.title:
+            return cached[2]
+        line = f"{absolute_idx + 1:>3} [{bookmark.folder}] {bookmark.title}".ljust(width)
+        self.rows[absolute_idx] = (bookmark.folder, bookmark.title, line)
+        return line
+
+
+def draw_ui(
+    stdscr,
+    display_items: List[Tuple[int, Bookmark]],
     selected: int,
     offset: int,
     status: str,
@@ -400,8 +2294,12 @@ def draw_ui(
     focus_detail: bool,
     detail_selected: int,
     focus_border_attr: int,
+    frame: Optional[FrameCache] = None,
 ) -> Tuple[int, int]:
-    stdscr.erase()
+    if frame is None:
+        frame = FrameCache()
+    started = time.perf_counter()
+    rows_drawn = 0
     h, w = stdscr.getmaxyx()
     header_height = 3  # boxed header
     rows_for_menu = command_rows(SHORTCUTS_SEGMENTS) if shortcuts_visible else []
@@ -416,6 +2314,10 @@ def draw_ui(
     detail_width = max(0, w - list_width)
     footer_y = h - footer_rows
     list_start_y = header_height
+    if frame.changed("layout", (h, w, footer_rows)):
+        stdscr.erase()
+        frame.invalidate()
+        frame.changed("layout", (h, w, footer_rows))
 
     header_parts = ["Bookmarks"]
     if folder_filter:
@@ -423,48 +2325,65 @@ def draw_ui(
     if search_query:
         header_parts.append(f"/{search_query}")
     header = " ".join(header_parts)
-    # Draw full-width box header
-    stdscr.addch(0, 0, curses.ACS_ULCORNER)
-    stdscr.hline(0, 1, curses.ACS_HLINE, max(0, w - 2))
-    stdscr.addch(0, max(0, w - 1), curses.ACS_URCORNER)
-    stdscr.addch(header_height - 1, 0, curses.ACS_LLCORNER)
-    stdscr.hline(header_height - 1, 1, curses.ACS_HLINE, max(0, w - 2))
-    stdscr.addch(header_height - 1, max(0, w - 1), curses.ACS_LRCORNER)
-    for y in range(1, header_height - 1):
-        stdscr.addch(y, 0, curses.ACS_VLINE)
-        stdscr.addch(y, max(0, w - 1), curses.ACS_VLINE)
-    if header:
-        text_x = max(2, (w - len(header)) // 2)
-        stdscr.addnstr(1, text_x, header[: max(0, w - text_x - 2)], max(0, w - text_x - 2), shortcut_attr)
+    if frame.changed("header", (header, shortcut_attr)):
+        # Draw full-width box header
+        stdscr.addch(0, 0, curses.ACS_ULCORNER)
+        stdscr.hline(0, 1, curses.ACS_HLINE, max(0, w - 2))
+        stdscr.addch(0, max(0, w - 1), curses.ACS_URCORNER)
+        stdscr.addch(header_height - 1, 0, curses.ACS_LLCORNER)
+        stdscr.hline(header_height - 1, 1, curses.ACS_HLINE, max(0, w - 2))
+        stdscr.addch(header_height - 1, max(0, w - 1), curses.ACS_LRCORNER)
+        for y in range(1, header_height - 1):
+            stdscr.addch(y, 0, curses.ACS_VLINE)
+            stdscr.addnstr(y, 1, " " * max(0, w - 2), max(0, w - 2))
+            stdscr.addch(y, max(0, w - 1), curses.ACS_VLINE)
+        if header:
+            text_x = max(2, (w - len(header)) // 2)
+            stdscr.addnstr(1, text_x, header[: max(0, w - text_x - 2)], max(0, w - text_x - 2), shortcut_attr)
 
     # List pane with box
     list_border_attr = focus_border_attr if not focus_detail else curses.A_NORMAL
-    draw_box(stdscr, list_start_y, 0, body_height, list_width, list_border_attr)
+    if frame.changed("list_box", list_border_attr):
+        draw_box(stdscr, list_start_y, 0, body_height, list_width, list_border_attr)
     visible = display_items[offset : offset + list_height]
-    for idx, (absolute_idx, bookmark) in enumerate(visible):
+    row_width = list_width - 2
+    for idx in range(list_height):
         y = list_start_y + 1 + idx
-        folder = bookmark.get("folder", "General")
-        line = f"{absolute_idx + 1:>3} [{folder}] {bookmark.get('title', '')}"
-        attr = highlight_attr if (offset + idx) == selected else curses.A_NORMAL
-        stdscr.addnstr(y, 1, line.ljust(list_width - 2), list_width - 2, attr)
+        if idx < len(visible):
+            absolute_idx, bookmark = visible[idx]
+            line = frame.row(absolute_idx, bookmark, row_width)
+            attr = highlight_attr if (offset + idx) == selected else curses.A_NORMAL
+        else:
+            line, attr = " " * row_width, curses.A_NORMAL
+        if frame.changed(("list", y), (line, attr)):
+            stdscr.addnstr(y, 1, line, row_width, attr)
+            rows_drawn += 1
 
     # Detail pane with box
     if detail_width >= 6:
         detail_border_attr = focus_border_attr if focus_detail else curses.A_NORMAL
-        draw_box(stdscr, list_start_y, list_width, body_height, detail_width, detail_border_attr)
-        if detail_lines:
-            for i, line in enumerate(detail_lines[: body_height - 2]):
-                attr = highlight_attr if focus_detail and i == detail_selected else curses.A_NORMAL
+        if frame.changed("detail_box", detail_border_attr):
+            draw_box(stdscr, list_start_y, list_width, body_height, detail_width, detail_border_attr)
+        for i in range(body_height - 2):
+            line = detail_lines[i] if i < len(detail_lines) else ""
+            attr = highlight_attr if focus_detail and i == detail_selected and i < len(detail_lines) else curses.A_NORMAL
+            if frame.changed(("detail", i), (line, attr)):
                 stdscr.addnstr(list_start_y + 1 + i, list_width + 1, line.ljust(detail_width - 2), detail_width - 2, attr)
+                rows_drawn += 1
 
-    if shortcuts_visible:
-        draw_footer(stdscr, footer_y, w, status, rows_for_menu, shortcut_attr)
-    else:
-        stdscr.hline(footer_y, 0, curses.ACS_HLINE, w)
-        for y in range(footer_y + 1, h):
-            stdscr.move(y, 0)
-            stdscr.clrtoeol()
-    stdscr.refresh()
+    if frame.changed("footer", (status, shortcuts_visible, shortcut_attr)):
+        if shortcuts_visible:
+            draw_footer(stdscr, footer_y, w, status, rows_for_menu, shortcut_attr)
+        else:
+            stdscr.hline(footer_y, 0, curses.ACS_HLINE, w)
+            for y in range(footer_y + 1, h):
+                stdscr.move(y, 0)
+                stdscr.clrtoeol()
+    stdscr.noutrefresh()
+    curses.doupdate()
+    if PROFILER.enabled:
+        PROFILER.count("rows_drawn", rows_drawn)
+        PROFILER.record("frame", time.perf_counter() - started, rows=rows_drawn, items=len(display_items))
     return list_height, list_width
 
 
@@ -558,11 +2477,28 @@ def draw_settings_screen(
     stdscr.refresh()
 
 
+# Keys that only move the selection or focus; nothing else draws on screen
+# while they are handled, so the frame cache stays valid.
+REDRAW_SAFE_KEYS = {
+    9,
+    curses.KEY_BTAB,
+    ord("k"),
+    ord("j"),
+    ord("g"),
+    ord("G"),
+    curses.KEY_UP,
+    curses.KEY_DOWN,
+    curses.KEY_HOME,
+    curses.KEY_END,
+}
+
+
 def main(stdscr):
     curses.curs_set(0)
     curses.use_default_colors()
     config = load_config()
     accent_fg = int(config.get("accent_color", 6)) if isinstance(config, dict) else 6
+    search_debounce = max(0, int(config.get("search_debounce_ms", SEARCH_DEBOUNCE_MS))) / 1000
     try:
         curses.init_pair(1, accent_fg, -1)
         highlight_attr = curses.color_pair(1) | curses.A_BOLD
@@ -575,13 +2511,24 @@ def main(stdscr):
         shortcut_attr = curses.A_BOLD
         focus_border_attr = curses.A_BOLD
 
-    bookmarks = load_bookmarks()
+    store = open_store()
+    bookmarks = store.load()
+    autosaver = Autosaver(store, float(config.get("autosave_seconds", AUTOSAVE_SECONDS)))
+    with PROFILER.phase("index", items=len(bookmarks)):
+        index = BookmarkIndex(bookmarks, autosaver.candidates if store.name == "sqlite" else None)
+    session = SearchSession(index)
+    searcher = SearchWorker(session)
+    history = UndoLog()
+    search_progress: Optional[int] = None
+    search_error: Optional[str] = None
     selected = 0
     offset = 0
     status = ""
     folder_filter = ""
     last_folder = folder_filter or "General"
     search_query = ""
+    list_rows = stdscr.getmaxyx()[0]
+    frame = FrameCache()
     last_key = None
     message_clear_time = 0.0
     shortcuts_visible = True
@@ -615,33 +2562,71 @@ def main(stdscr):
     def set_status(message: str, duration: float = 0.0) -> None:
         return
 
-    def build_display_items(query: str) -> List[Tuple[int, Dict[str, str]]]:
-        items = [
-            (idx, bm)
-            for idx, bm in enumerate(bookmarks)
-            if (not folder_filter)
-            or bm.get("folder", "General").lower() == folder_filter.lower()
-        ]
-        tokens = normalize_search(query)
-        if tokens:
-            items = [
-                item
-                for item in items
-                if all(
-                    token
-                    in " ".join(
-                        [
-                            (item[1].get(field, "") or "").lower()
-                            for field in ("title", "url", "folder", "note")
-                        ]
-                    )
-                    for token in tokens
-                )
-            ]
-        return items
+    def perform(op: Dict, record: bool = True) -> None:
+        kind = op["op"]
+        with searcher.lock:
+            if kind == "add":
+                bookmark = clean_bookmark(op["bookmark"])
+                position = index.insert(op.get("index", len(bookmarks)), bookmark)
+                delta: Delta = (position, None, bookmark.as_tuple())
+            elif kind == "delete":
+                delta = (op["index"], index.remove(op["index"]).as_tuple(), None)
+            elif kind == "move":
+                old = bookmarks[op["index"]].as_tuple()
+                bookmarks[op["index"]].folder = op["folder"]
+                index.update(op["index"])
+                delta = (op["index"], old, bookmarks[op["index"]].as_tuple())
+            else:
+                old = bookmarks[op["index"]].as_tuple()
+                index.update(op["index"], clean_bookmark(op["bookmark"]))
+                delta = (op["index"], old, bookmarks[op["index"]].as_tuple())
+        autosaver.queue(op)
+        if record:
+            history.record([delta])
 
-    def render_search_preview(current: str) -> None:
-        nonlocal search_query, selected, offset, detail_selected
+    def replay_history(ops: List[Dict]) -> Optional[int]:
+        # Applies undo/redo ops and returns the position of the last one.
+        for op in ops:
+            perform(op, record=False)
+        return ops[-1]["index"] if ops else None
+
+    def build_display_items(query: str) -> List[Tuple[int, Bookmark]]:
+        nonlocal search_progress, search_error
+        search_progress = None
+        search_error = None
+        pattern = fuzzy_query(query)
+        text = query if pattern is None else pattern
+        if not normalize_search(text):
+            if not folder_filter:
+                return list(enumerate(bookmarks))
+            with searcher.lock:
+                positions = index.folder_positions(folder_filter)
+            return [(idx, bookmarks[idx]) for idx in positions]
+        fuzzy_folder = folder_filter if pattern is not None else ""
+        hits, done = searcher.results((pattern is not None, text, fuzzy_folder, index.generation), SEARCH_WAIT)
+        if searcher.error is not None:
+            search_error = searcher.error
+        elif not done:
+            search_progress = len(hits)
+        elif pattern is not None:
+            # Rank just past the visible window; scrolling further re-ranks.
+            limit = max(selected, offset) + list_rows
+            with searcher.lock, PROFILER.phase("rank", query=pattern, limit=limit):
+                hits = session.fuzzy(pattern, limit, folder_filter)
+        if not folder_filter or pattern is not None:
+            return [(idx, bookmarks[idx]) for idx in hits]
+        wanted = folder_key(folder_filter)
+        return [(idx, bookmarks[idx]) for idx in hits if index.folder_key(idx) == wanted]
+
+    def frame_status() -> str:
+        if search_error is not None:
+            return search_error
+        if search_progress is None:
+            return status
+        return f"Searching… {search_progress} hits so far"
+
+    def render_search_preview(current: str) -> bool:
+        nonlocal search_query, selected, offset, detail_selected, list_rows
         search_query = current.strip()
         selected = 0
         offset = 0
@@ -659,19 +2644,19 @@ def main(stdscr):
         detail_title = ""
         if detail_width >= 6 and display_items and 0 <= selected < len(display_items):
             _, current_item = display_items[selected]
-            detail_title = current_item.get("title", "")
+            detail_title = current_item.title
             detail_lines = [
-                f"Folder: {current_item.get('folder', '')}",
-                f"Title:  {current_item.get('title', '')}",
-                f"URL:    {current_item.get('url', '')}",
-                f"Note:   {current_item.get('note', '')}",
+                f"Folder: {current_item.folder}",
+                f"Title:  {current_item.title}",
+                f"URL:    {current_item.url}",
+                f"Note:   {current_item.note}",
             ]
-        draw_ui(
+        list_rows, _ = draw_ui(
             stdscr,
             display_items,
             selected,
             offset,
-            status,
+            frame_status(),
             highlight_attr,
             shortcut_attr,
             detail_title,
@@ -682,313 +2667,350 @@ def main(stdscr):
             focus == "detail",
             detail_selected,
             focus_border_attr,
+            frame,
         )
+        return search_progress is not None
 
-    while True:
-        if settings_mode:
-            draw_settings_screen(
+    def hang_up(signum, _frame) -> None:
+        raise SystemExit(1)
+
+    # Closing the terminal or a kill still flushes the queued changes.
+    signal.signal(signal.SIGHUP, hang_up)
+    signal.signal(signal.SIGTERM, hang_up)
+    first_frame = True
+    try:
+        while True:
+            if settings_mode:
+                frame.invalidate()
+                draw_settings_screen(
+                    stdscr,
+                    available_colors,
+                    settings_selected_idx,
+                    accent_fg,
+                    status,
+                    highlight_attr,
+                    shortcut_attr,
+                    settings_view,
+                )
+                key = stdscr.getch()
+                last_key = None
+                if key in (ord("q"), ord("Q")):
+                    settings_mode = False
+                    settings_view = "menu"
+                    continue
+                if not available_colors:
+                    continue
+                if settings_view == "menu":
+                    if key in (ord("c"), ord("C")):
+                        settings_view = "colors"
+                    continue
+                if key in (ord("k"), curses.KEY_UP):
+                    settings_selected_idx = (settings_selected_idx - 1) % len(available_colors)
+                    continue
+                if key in (ord("j"), curses.KEY_DOWN):
+                    settings_selected_idx = (settings_selected_idx + 1) % len(available_colors)
+                    continue
+                if key in (curses.ascii.LF, curses.ascii.CR, curses.KEY_ENTER, ord(" ")):
+                    fg_code = available_colors[settings_selected_idx][0]
+                    apply_accent(fg_code)
+                    continue
+                continue
+
+            display_items = build_display_items(search_query)
+            total = len(display_items)
+            selected = clamp(selected, 0, max(0, total - 1))
+            # Precompute layout to know if detail pane is available
+            h, w = stdscr.getmaxyx()
+            header_height = 3
+            footer_rows = 3
+            body_height = max(3, h - footer_rows - header_height)
+            list_width = min(max(20, int(w * 0.55)), max(10, w))
+            detail_width = max(0, w - list_width)
+            detail_lines: List[str] = []
+            detail_title = ""
+            if detail_width >= 6 and display_items and 0 <= selected < len(display_items):
+                _, current = display_items[selected]
+                detail_title = current.title
+                detail_lines = [
+                    f"Folder: {current.folder}",
+                    f"Title:  {current.title}",
+                    f"URL:    {current.url}",
+                    f"Note:   {current.note}",
+                ]
+            detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
+            list_height, _ = draw_ui(
                 stdscr,
-                available_colors,
-                settings_selected_idx,
-                accent_fg,
-                status,
+                display_items,
+                selected,
+                offset,
+                frame_status(),
                 highlight_attr,
                 shortcut_attr,
-                settings_view,
+                detail_title,
+                detail_lines,
+                folder_filter,
+                search_query,
+                shortcuts_visible,
+                focus == "detail",
+                detail_selected,
+                focus_border_attr,
+                frame,
             )
+            offset = ensure_visible(selected, offset, list_height)
+            list_rows = list_height
+            if first_frame:
+                first_frame = False
+                PROFILER.record("first_frame", time.perf_counter() - PROFILER.started, items=len(bookmarks))
+
+            # Poll while a search is still running so its hits keep appearing.
+            stdscr.timeout(SEARCH_POLL_MS if search_progress is not None else -1)
             key = stdscr.getch()
-            last_key = None
-            if key in (ord("q"), ord("Q")):
-                settings_mode = False
-                settings_view = "menu"
-                continue
-            if not available_colors:
-                continue
-            if settings_view == "menu":
-                if key in (ord("c"), ord("C")):
-                    settings_view = "colors"
-                continue
-            if key in (ord("k"), curses.KEY_UP):
-                settings_selected_idx = (settings_selected_idx - 1) % len(available_colors)
+            stdscr.timeout(-1)
+            if key == -1:
                 continue
-            if key in (ord("j"), curses.KEY_DOWN):
-                settings_selected_idx = (settings_selected_idx + 1) % len(available_colors)
+            if key not in REDRAW_SAFE_KEYS:
+                # Prompts, pickers and confirmations draw over the frame.
+                frame.invalidate()
+            if key in (9, curses.KEY_BTAB):
+                if focus == "list" and detail_width >= 6 and detail_lines:
+                    focus = "detail"
+                    detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
+                else:
+                    focus = "list"
+                last_key = None
                 continue
-            if key in (curses.ascii.LF, curses.ascii.CR, curses.KEY_ENTER, ord(" ")):
-                fg_code = available_colors[settings_selected_idx][0]
-                apply_accent(fg_code)
+            if key in (ord("q"), ord("Q")):
+                break
+            if key in (ord("s"), ord("S")):
+                settings_mode = True
+                last_key = None
+                if available_colors:
+                    try:
+                        settings_selected_idx = [code for code, _ in available_colors].index(accent_fg)
+                    except ValueError:
+                        settings_selected_idx = 0
                 continue
-            continue
-
-        display_items = build_display_items(search_query)
-        total = len(display_items)
-        selected = clamp(selected, 0, max(0, total - 1))
-        # Precompute layout to know if detail pane is available
-        h, w = stdscr.getmaxyx()
-        header_height = 3
-        footer_rows = 3
-        body_height = max(3, h - footer_rows - header_height)
-        list_width = min(max(20, int(w * 0.55)), max(10, w))
-        detail_width = max(0, w - list_width)
-        detail_lines: List[str] = []
-        detail_title = ""
-        if detail_width >= 6 and display_items and 0 <= selected < len(display_items):
-            _, current = display_items[selected]
-            detail_title = current.get("title", "")
-            detail_lines = [
-                f"Folder: {current.get('folder', '')}",
-                f"Title:  {current.get('title', '')}",
-                f"URL:    {current.get('url', '')}",
-                f"Note:   {current.get('note', '')}",
-            ]
-        detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
-        list_height, _ = draw_ui(
-            stdscr,
-            display_items,
-            selected,
-            offset,
-            status,
-            highlight_attr,
-            shortcut_attr,
-            detail_title,
-            detail_lines,
-            folder_filter,
-            search_query,
-            shortcuts_visible,
-            focus == "detail",
-            detail_selected,
-            focus_border_attr,
-        )
-        offset = ensure_visible(selected, offset, list_height)
-
-        key = stdscr.getch()
-        if key in (9, curses.KEY_BTAB):
-            if focus == "list" and detail_width >= 6 and detail_lines:
-                focus = "detail"
-                detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
-            else:
-                focus = "list"
-            last_key = None
-            continue
-        if key in (ord("q"), ord("Q")):
-            break
-        if key in (ord("s"), ord("S")):
-            settings_mode = True
-            last_key = None
-            if available_colors:
+            elif key in (ord("k"), curses.KEY_UP):
+                if focus == "detail":
+                    detail_selected -= 1
+                    detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
+                else:
+                    selected -= 1
+            elif key in (ord("j"), curses.KEY_DOWN):
+                if focus == "detail":
+                    detail_selected += 1
+                    detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
+                else:
+                    selected += 1
+            elif key in (ord("g"),):
+                selected = 0
+            elif key in (ord("G"),):
+                selected = max(0, total - 1)
+            elif key == curses.KEY_HOME:
+                selected = 0
+            elif key == curses.KEY_END:
+                selected = max(0, total - 1)
+            elif key in (ord("o"), ord("O")):
+                if not display_items:
+                    set_status("Nothing to open.")
+                    continue
+                _, current = display_items[selected]
+                url = current.url
+                if not url:
+                    set_status("Bookmark has no URL.")
+                    continue
                 try:
-                    settings_selected_idx = [code for code, _ in available_colors].index(accent_fg)
-                except ValueError:
-                    settings_selected_idx = 0
-            continue
-        elif key in (ord("k"), curses.KEY_UP):
-            if focus == "detail":
-                detail_selected -= 1
-                detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
-            else:
-                selected -= 1
-        elif key in (ord("j"), curses.KEY_DOWN):
-            if focus == "detail":
-                detail_selected += 1
-                detail_selected = clamp(detail_selected, 0, max(0, len(detail_lines) - 1))
-            else:
-                selected += 1
-        elif key in (ord("g"),):
-            selected = 0
-        elif key in (ord("G"),):
-            selected = max(0, total - 1)
-        elif key == curses.KEY_HOME:
-            selected = 0
-        elif key == curses.KEY_END:
-            selected = max(0, total - 1)
-        elif key in (ord("o"), ord("O")):
-            if not display_items:
-                set_status("Nothing to open.")
-                continue
-            _, current = display_items[selected]
-            url = current.get("url", "")
-            if not url:
-                set_status("Bookmark has no URL.")
-                continue
-            try:
-                webbrowser.open(url)
-                set_status(f"Opened {url}")
-            except Exception as exc:  # pragma: no cover - defensive
-                set_status(f"Failed to open: {exc}")
-        elif key in (ord("a"), ord("A")):
-            default_folder = last_folder or folder_filter or "General"
-            folder = prompt_folder(stdscr, bookmarks, default_folder)
-            title = prompt_input(stdscr, "Title")
-            if not title:
-                set_status("Add canceled (empty title).")
-                continue
-            url = prompt_input(stdscr, "URL")
-            if not url:
-                set_status("Add canceled (empty URL).")
-                continue
-            note = prompt_input(stdscr, "Note (optional)", "")
-            bookmarks.append({"title": title, "url": url, "folder": folder, "note": note})
-            last_folder = folder
-            display_items = [
-                (idx, bm)
-                for idx, bm in enumerate(bookmarks)
-                if (not folder_filter)
-                or bm.get("folder", "General").lower() == folder_filter.lower()
-            ]
-            if display_items:
-                selected = len(display_items) - 1
-            set_status(f"Added '{title}'.")
-        elif key in (ord("e"), ord("E")):
-            if not display_items:
-                set_status("Nothing to edit.")
-                continue
-            original_index, current = display_items[selected]
-            folder = current.get("folder", "General")
-            if focus == "detail" and detail_lines:
-                idx = clamp(detail_selected, 0, len(detail_lines) - 1)
-                if idx == 0:
-                    new_folder = prompt_folder(stdscr, bookmarks, folder)
-                    if not new_folder:
-                        set_status("Edit canceled (empty folder).")
-                        continue
-                    bookmarks[original_index]["folder"] = new_folder
-                    last_folder = new_folder
-                    set_status(f"Folder set to '{new_folder}'.")
-                elif idx == 1:
-                    title = prompt_input(stdscr, "Edit title", current.get("title", ""))
+                    webbrowser.open(url)
+                    set_status(f"Opened {url}")
+                except Exception as exc:  # pragma: no cover - defensive
+                    set_status(f"Failed to open: {exc}")
+            elif key in (ord("a"), ord("A")):
+                default_folder = last_folder or folder_filter or "General"
+                folder = prompt_folder(stdscr, index, default_folder)
+                title = prompt_input(stdscr, "Title")
+                if not title:
+                    set_status("Add canceled (empty title).")
+                    continue
+                url = prompt_input(stdscr, "URL")
+                if not url:
+                    set_status("Add canceled (empty URL).")
+                    continue
+                note = prompt_input(stdscr, "Note (optional)", "")
+                perform({"op": "add", "bookmark": {"title": title, "url": url, "folder": folder, "note": note}})
+                last_folder = folder
+                display_items = build_display_items(search_query)
+                if display_items:
+                    selected = len(display_items) - 1
+                set_status(f"Added '{title}'.")
+            elif key in (ord("e"), ord("E")):
+                if not display_items:
+                    set_status("Nothing to edit.")
+                    continue
+                original_index, current = display_items[selected]
+                folder = current.folder
+                if focus == "detail" and detail_lines:
+                    idx = clamp(detail_selected, 0, len(detail_lines) - 1)
+                    if idx == 0:
+                        new_folder = prompt_folder(stdscr, index, folder)
+                        if not new_folder:
+                            set_status("Edit canceled (empty folder).")
+                            continue
+                        perform({"op": "move", "index": original_index, "old": current.to_dict(), "folder": new_folder})
+                        last_folder = new_folder
+                        set_status(f"Folder set to '{new_folder}'.")
+                    elif idx == 1:
+                        title = prompt_input(stdscr, "Edit title", current.title)
+                        if not title:
+                            set_status("Edit canceled (empty title).")
+                            continue
+                        perform(
+                            {
+                                "op": "edit",
+                                "index": original_index,
+                                "old": current.to_dict(),
+                                "bookmark": {**current.to_dict(), "title": title},
+                            }
+                        )
+                        set_status(f"Updated title to '{title}'.")
+                    elif idx == 2:
+                        url = prompt_input(stdscr, "Edit URL", current.url)
+                        if not url:
+                            set_status("Edit canceled (empty URL).")
+                            continue
+                        perform(
+                            {
+                                "op": "edit",
+                                "index": original_index,
+                                "old": current.to_dict(),
+                                "bookmark": {**current.to_dict(), "url": url},
+                            }
+                        )
+                        set_status("Updated URL.")
+                    else:
+                        note = prompt_input(stdscr, "Edit note", current.note)
+                        perform(
+                            {
+                                "op": "edit",
+                                "index": original_index,
+                                "old": current.to_dict(),
+                                "bookmark": {**current.to_dict(), "note": note},
+                            }
+                        )
+                        set_status("Updated note.")
+                else:
+                    title = prompt_input(stdscr, "Edit title", current.title)
                     if not title:
                         set_status("Edit canceled (empty title).")
                         continue
-                    bookmarks[original_index]["title"] = title
-                    set_status(f"Updated title to '{title}'.")
-                elif idx == 2:
-                    url = prompt_input(stdscr, "Edit URL", current.get("url", ""))
+                    url = prompt_input(stdscr, "Edit URL", current.url)
                     if not url:
                         set_status("Edit canceled (empty URL).")
                         continue
-                    bookmarks[original_index]["url"] = url
-                    set_status("Updated URL.")
-                else:
-                    note = prompt_input(stdscr, "Edit note", current.get("note", ""))
-                    bookmarks[original_index]["note"] = note
-                    set_status("Updated note.")
-            else:
-                title = prompt_input(stdscr, "Edit title", current.get("title", ""))
-                if not title:
-                    set_status("Edit canceled (empty title).")
+                    note = prompt_input(stdscr, "Edit note", current.note)
+                    perform(
+                        {
+                            "op": "edit",
+                            "index": original_index,
+                            "old": current.to_dict(),
+                            "bookmark": {
+                                "title": title,
+                                "url": url,
+                                "folder": folder,
+                                "note": note,
+                            },
+                        }
+                    )
+                    last_folder = folder
+                    set_status(f"Updated '{title}'.")
+            elif key in (ord("m"), ord("M")):
+                if not display_items:
+                    set_status("Nothing to move.")
                     continue
-                url = prompt_input(stdscr, "Edit URL", current.get("url", ""))
-                if not url:
-                    set_status("Edit canceled (empty URL).")
+                original_index, current = display_items[selected]
+                new_folder = prompt_folder(stdscr, index, current.folder)
+                if not new_folder:
+                    set_status("Move canceled (empty folder).")
                     continue
-                note = prompt_input(stdscr, "Edit note", current.get("note", ""))
-                bookmarks[original_index] = {
-                    "title": title,
-                    "url": url,
-                    "folder": folder,
-                    "note": note,
-                }
-                last_folder = folder
-                set_status(f"Updated '{title}'.")
-        elif key in (ord("m"), ord("M")):
-            if not display_items:
-                set_status("Nothing to move.")
-                continue
-            original_index, current = display_items[selected]
-            new_folder = prompt_folder(stdscr, bookmarks, current.get("folder", "General"))
-            if not new_folder:
-                set_status("Move canceled (empty folder).")
-                continue
-            bookmarks[original_index]["folder"] = new_folder
-            last_folder = new_folder
-            display_items = [
-                (idx, bm)
-                for idx, bm in enumerate(bookmarks)
-                if (not folder_filter)
-                or bm.get("folder", "General").lower() == folder_filter.lower()
-            ]
-            if search_query:
-                tokens = normalize_search(search_query)
-                display_items = [
-                    item
-                    for item in display_items
-                    if all(
-                        token
-                        in " ".join(
-                            [
-                                (item[1].get(field, "") or "").lower()
-                                for field in ("title", "url", "folder", "note")
-                            ]
-                        )
-                        for token in tokens
-                        )
-                ]
-            selected = clamp(selected, 0, max(0, len(display_items) - 1))
-            set_status(f"Moved to '{new_folder}'.")
-        elif key in (ord("d"), ord("D")):
-            if not display_items:
-                status = ""
-                continue
-            curses.curs_set(0)
-            h, w = stdscr.getmaxyx()
-            msg1 = "Do you really want to delete this entry?"
-            msg2 = "[y/n]"
-            stdscr.move(h - 2, 0)
-            stdscr.clrtoeol()
-            stdscr.addnstr(h - 2, 0, msg1[: w - 1], w - 1)
-            stdscr.move(h - 1, 0)
-            stdscr.clrtoeol()
-            stdscr.addnstr(h - 1, 0, msg2[: w - 1], w - 1)
-            stdscr.refresh()
-            confirm = None
-            while confirm not in (ord("y"), ord("Y"), ord("n"), ord("N")):
-                confirm = stdscr.getch()
-            if confirm in (ord("y"), ord("Y")):
-                original_index, removed = display_items[selected]
-                bookmarks.pop(original_index)
-                display_items = [
-                    (idx, bm)
-                    for idx, bm in enumerate(bookmarks)
-                    if (not folder_filter)
-                    or bm.get("folder", "General").lower() == folder_filter.lower()
-                ]
+                perform({"op": "move", "index": original_index, "old": current.to_dict(), "folder": new_folder})
+                last_folder = new_folder
+                display_items = build_display_items(search_query)
                 selected = clamp(selected, 0, max(0, len(display_items) - 1))
-            status = ""
-        elif key == ord("/"):
-            search_query = ""
-            selected = 0
-            offset = 0
-            new_query = prompt_input(
-                stdscr,
-                "Search",
-                "",
-                on_change=render_search_preview,
-            )
-            search_query = new_query.strip()
-            selected = 0
-            offset = 0
-            set_status("Search cleared." if not search_query else f"Searching for '{search_query}'.")
-        elif key in (ord("f"), ord("F")):
-            folders = gather_folders(bookmarks)
-            options = ["<All>"] + folders
-            try:
-                initial_idx = options.index(folder_filter) if folder_filter else 0
-            except ValueError:
-                initial_idx = 0
-            selection = folder_picker(stdscr, options, initial_idx)
-            if selection == "<All>":
-                folder_filter = ""
-                set_status("Filter cleared.")
+                set_status(f"Moved to '{new_folder}'.")
+            elif key in (ord("d"), ord("D")):
+                if not display_items:
+                    status = ""
+                    continue
+                curses.curs_set(0)
+                h, w = stdscr.getmaxyx()
+                msg1 = "Do you really want to delete this entry?"
+                msg2 = "[y/n]"
+                stdscr.move(h - 2, 0)
+                stdscr.clrtoeol()
+                stdscr.addnstr(h - 2, 0, msg1[: w - 1], w - 1)
+                stdscr.move(h - 1, 0)
+                stdscr.clrtoeol()
+                stdscr.addnstr(h - 1, 0, msg2[: w - 1], w - 1)
+                stdscr.refresh()
+                confirm = None
+                while confirm not in (ord("y"), ord("Y"), ord("n"), ord("N")):
+                    confirm = stdscr.getch()
+                if confirm in (ord("y"), ord("Y")):
+                    original_index, removed = display_items[selected]
+                    perform({"op": "delete", "index": original_index, "old": removed.to_dict()})
+                    display_items = build_display_items(search_query)
+                    selected = clamp(selected, 0, max(0, len(display_items) - 1))
+                status = ""
+            elif key == ord("/"):
+                search_query = ""
+                selected = 0
+                offset = 0
+                new_query = prompt_input(
+                    stdscr,
+                    "Search",
+                    "",
+                    on_change=render_search_preview,
+                    debounce=search_debounce,
+                )
+                # The prompt drew over the footer behind the frame cache's back.
+                frame.invalidate()
+                search_query = new_query.strip()
+                selected = 0
+                offset = 0
+                set_status("Search cleared." if not search_query else f"Searching for '{search_query}'.")
+            elif key in (ord("u"), ord("U"), 18):  # u undo, U / Ctrl-R redo
+                position = replay_history(history.undo() if key == ord("u") else history.redo())
+                if position is None:
+                    set_status("Nothing to undo." if key == ord("u") else "Nothing to redo.")
+                    continue
+                display_items = build_display_items(search_query)
+                for row, (absolute_idx, _) in enumerate(display_items):
+                    if absolute_idx >= position:
+                        selected = row
+                        break
+                set_status("Undone." if key == ord("u") else "Redone.")
+            elif key in (ord("f"), ord("F")):
+                folders = index.folders()
+                options = ["<All>"] + folders
+                try:
+                    initial_idx = options.index(folder_filter) if folder_filter else 0
+                except ValueError:
+                    initial_idx = 0
+                counts = index.folder_counts()
+                counts["<All>"] = len(bookmarks)
+                selection = folder_picker(stdscr, options, initial_idx, counts)
+                if selection == "<All>":
+                    folder_filter = ""
+                    set_status("Filter cleared.")
+                else:
+                    folder_filter = selection
+                    set_status(f"Filtering by '{folder_filter}'.")
+                selected = 0
+                offset = 0
             else:
-                folder_filter = selection
-                set_status(f"Filtering by '{folder_filter}'.")
-            selected = 0
-            offset = 0
-        else:
-            pass
-        last_key = None
-
-    save_bookmarks(bookmarks)
+                pass
+            last_key = None
+    finally:
+        autosaver.close()
 
 
 def parse_args() -> argparse.Namespace:
@@ -1000,11 +3022,16 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Add a bookmark from CLI flags and exit (no TUI).",
     )
+    mode.add_argument(
+        "--add-batch",
+        action="store_true",
+        help="Add bookmarks read from stdin (NDJSON objects or title<TAB>url[<TAB>folder[<TAB>note]] lines) and exit.",
+    )
     mode.add_argument(
         "-l",
         "--list",
         action="store_true",
-        help="List bookmarks to stdout (tab-delimited) and exit (no TUI).",
+        help="List bookmarks matching QUERY to stdout and exit (no TUI).",
     )
     mode.add_argument(
         "-r",
@@ -1012,111 +3039,353 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Show bookmarks in rofi -dmenu and open the selection (no TUI).",
     )
+    mode.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold the operation journal into the bookmarks file and exit (no TUI).",
+    )
+    mode.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Collapse bookmarks whose URLs are the same after normalisation and exit (no TUI).",
+    )
+    mode.add_argument(
+        "--migrate-sqlite",
+        nargs="?",
+        const="",
+        metavar="DB",
+        help="Copy the JSON store into a SQLite database (default: data file with .db suffix) and exit.",
+    )
     mode.add_argument(
         "--import-html",
-        metavar="FILE",
-        help="Import bookmarks from a browser-exported bookmarks HTML file and exit (no TUI).",
+        metavar="PATH",
+        nargs="+",
+        help=(
+            "Import bookmarks from browser-exported bookmarks HTML files or directories of them "
+            "and exit (no TUI)."
+        ),
     )
-    parser.add_argument("-n", "--name", help="Bookmark title (required with --add).")
+    mode.add_argument(
+        "--check-links",
+        action="store_true",
+        help=f"Check every http(s) URL, print the broken ones and record the results in {LINKS_FILE.name}.",
+    )
+    mode.add_argument(
+        "--enrich",
+        action="store_true",
+        help=(
+            "Fetch pages of bookmarks matching QUERY that have no real title or no note, "
+            "fill in the page title and description and exit."
+        ),
+    )
+    mode.add_argument(
+        "--undo-import",
+        action="store_true",
+        help="Revert the most recent --import-html run (its adds and note merges) and exit.",
+    )
+    parser.add_argument("-n", "--name", help="Bookmark title for --add (default: the URL).")
     parser.add_argument("-u", "--url", help="Bookmark URL (required with --add).")
     parser.add_argument(
         "-f",
         "--folder",
-        default="General",
-        help="Folder name (default: General).",
+        help="Folder name for --add/--add-batch (default: General); folder filter for --list.",
     )
     parser.add_argument("--note", default="", help="Optional note content.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=0,
+        help=(
+            "Worker processes for --import-html with several files (default: CPU count), "
+            "or parallel requests for --check-links/--enrich (default: 16)."
+        ),
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=LINK_MAX_AGE_HOURS,
+        help="Skip links checked less than this many hours ago with --check-links (default: 24).",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=HTTP_PER_HOST,
+        help="Parallel connections per host for --check-links (default: 2).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=HTTP_TIMEOUT,
+        help="Per-request timeout in seconds for --check-links (default: 10).",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=ENRICH_RATE,
+        help="Requests per second per host for --enrich (default: 2).",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="1",
+        metavar="FILE",
+        help=(
+            "Record load/search/frame/save timings as JSON lines in FILE "
+            "(default: ~/.cache/marks/profile.jsonl) and print a summary on exit. "
+            "Same as MARKS_PROFILE=1 or MARKS_PROFILE=FILE."
+        ),
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="FILE",
+        help="Also run the session under cProfile and write its stats to FILE (implies --profile).",
+    )
+    parser.add_argument(
+        "--allow-duplicates",
+        action="store_true",
+        help="Keep bookmarks whose URL is already stored (--add/--import-html).",
+    )
     parser.add_argument(
         "--include-note",
         action="store_true",
-        help="Include note as a 4th column when using --list.",
+        help="Append the note (' | note') to plain --list output.",
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Match QUERY tokens as fuzzy subsequences with --list and print the best matches first.",
     )
+    parser.add_argument(
+        "--format",
+        choices=("plain", "tsv", "ndjson"),
+        default="plain",
+        help="Output format for --list (default: plain '[Folder] Title - URL').",
+    )
+    parser.add_argument("--limit", type=int, default=0, help="Print at most this many bookmarks with --list.")
+    parser.add_argument("--offset", type=int, default=0, help="Skip this many matches with --list.")
+    parser.add_argument("query", nargs="*", help="Search tokens for --list (same matching as the TUI search).")
     return parser.parse_args()
 
 
+def notify(message: str) -> None:
+    if shutil.which("notify-send"):
+        subprocess.run(["notify-send", "marks", message], check=False)
+    else:
+        print(message)
+
+
 def handle_cli_add(args: argparse.Namespace) -> int:
-    if not args.name or not args.url:
-        print("Error: --name and --url are required with --add.", file=sys.stderr)
+    if not args.url:
+        print("Error: --url is required with --add.", file=sys.stderr)
         return 2
 
-    bookmarks = load_bookmarks()
     try:
-        bookmarks.append(make_bookmark(args.name, args.url, args.folder, args.note))
+        added = make_bookmark(args.name, args.url, args.folder or "General", args.note)
     except ValueError as exc:
         print(f"Error: {exc}", file=sys.stderr)
         return 2
 
-    save_bookmarks(bookmarks)
-    added = bookmarks[-1]
-    message = f"Added '{added['title']}' to folder '{added['folder']}'."
-    if shutil.which("notify-send"):
-        subprocess.run(["notify-send", "marks", message], check=False)
+    urls = UrlIndex(open_store(), args.allow_duplicates)
+    existing = urls.find(added.url)
+    ops = urls.admit(added)
+    commit_operations(ops)
+    open_store().maintain()
+    if existing is None:
+        message = f"Added '{added.title}' to folder '{added.folder}'."
+    elif ops:
+        message = f"Already bookmarked as '{existing.title}' in '{existing.folder}'; merged the note."
     else:
-        print(message)
+        message = f"Already bookmarked as '{existing.title}' in '{existing.folder}'."
+    notify(message)
     return 0
 
 
-def handle_cli_list(args: argparse.Namespace) -> int:
-    bookmarks = load_bookmarks()
+def parse_batch_line(line: str, default_folder: str) -> Bookmark:
+    if line.lstrip().startswith("{"):
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"invalid JSON ({exc})") from exc
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+        return make_bookmark(
+            str(record.get("title") or record.get("name") or ""),
+            str(record.get("url") or ""),
+            str(record.get("folder") or default_folder),
+            str(record.get("note") or ""),
+        )
+    fields = line.strip("\r\n").split("\t")
+    if len(fields) == 1:
+        fields = ["", fields[0]]
+    fields += [""] * (4 - len(fields))
+    title, url, folder, note = fields[:4]
+    return make_bookmark(title, url, folder or default_folder, note)
 
-    def clean(value: str) -> str:
-        return (value or "").replace("\n", " ").replace("\t", " ").strip()
 
-    for bm in bookmarks:
-        folder = clean(bm.get("folder", "General") or "General")
-        title = clean(bm.get("title", ""))
-        url = clean(bm.get("url", ""))
-        line = f"[{folder}] {title} - {url}"
-        if args.include_note:
-            note = clean(bm.get("note", ""))
-            if note:
-                line = f"{line} | {note}"
-        print(line.strip())
-    return 0
+def handle_cli_add_batch(args: argparse.Namespace) -> int:
+    urls = UrlIndex(open_store(), args.allow_duplicates)
+    ops: List[Dict] = []
+    errors = 0
+    for line_no, line in enumerate(sys.stdin, 1):
+        if not line.strip():
+            continue
+        try:
+            bookmark = parse_batch_line(line, args.folder or "General")
+        except ValueError as exc:
+            errors += 1
+            print(f"Error: line {line_no}: {exc}", file=sys.stderr)
+            continue
+        ops.extend(urls.admit(bookmark))
+    commit_operations(ops)
+    open_store().maintain()
+    failed = f", {errors} invalid lines" if errors else ""
+    notify(f"Added {urls.added} bookmarks{urls.summary()}{failed}.")
+    return 1 if errors else 0
 
 
-def handle_cli_rofi(args: argparse.Namespace) -> int:
-    if not shutil.which("rofi"):
-        print("Error: rofi not found. Install rofi or use --list with your launcher.", file=sys.stderr)
-        return 2
+LIST_FLUSH_LINES = 2048
+
+
+def clean_field(value: str) -> str:
+    return (value or "").replace("\n", " ").replace("\t", " ").strip()
 
-    bookmarks = load_bookmarks()
 
-    def clean(value: str) -> str:
-        return (value or "").replace("\n", " ").replace("\t", " ").strip()
+def format_list_line(bm: Bookmark, fmt: str, include_note: bool) -> str:
+    if fmt == "ndjson":
+        return json.dumps(bm.to_dict(), ensure_ascii=False)
+    folder = clean_field(bm.folder or "General")
+    title = clean_field(bm.title)
+    url = clean_field(bm.url)
+    if fmt == "tsv":
+        return "\t".join((folder, title, url, clean_field(bm.note)))
+    line = f"[{folder}] {title} - {url}"
+    if include_note:
+        note = clean_field(bm.note)
+        if note:
+            line = f"{line} | {note}"
+    return line.strip()
 
-    entries = []
+
+def handle_cli_list(args: argparse.Namespace) -> int:
+    tokens = normalize_search(" ".join(args.query))
+    stop = args.offset + args.limit if args.limit > 0 else None
+    if args.fuzzy and tokens:
+        bookmarks = open_store().load()
+        positions: Iterator[int] = iter(range(len(bookmarks)))
+        if args.folder:
+            wanted = folder_key(args.folder)
+            positions = (pos for pos in positions if folder_key(bookmarks[pos].folder) == wanted)
+        order = fuzzy_top(bookmarks, fuzzy_matches(bookmarks, positions, tokens), tokens, stop)
+        matches: Iterator[Bookmark] = (bookmarks[pos] for pos in order)
+    else:
+        matches = open_store().query(tokens, args.folder)
+    buffer: List[str] = []
+    try:
+        for bm in islice(matches, max(0, args.offset), stop):
+            buffer.append(format_list_line(bm, args.format, args.include_note))
+            if len(buffer) >= LIST_FLUSH_LINES:
+                sys.stdout.write("\n".join(buffer) + "\n")
+                buffer = []
+        if buffer:
+            sys.stdout.write("\n".join(buffer) + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Reader went away (e.g. `marks -l | head`); silence the final flush.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+    return 0
+
+
+MENU_CACHE_VERSION = 1
+MENU_WRITE_LINES = 4096
+
+
+def build_menu(bookmarks: List[Bookmark]) -> Tuple[List[str], List[str]]:
+    lines: List[str] = []
+    urls: List[str] = []
+    # The same lines as `marks -l`, so launchers can use either.
     for bm in bookmarks:
-        folder = clean(bm.get("folder", "General") or "General")
-        title = clean(bm.get("title", ""))
-        url = clean(bm.get("url", ""))
+        url = clean_field(bm.url)
         if not url:
             continue
-        line = f"[{folder}] {title} - {url}"
-        entries.append(line.strip())
+        lines.append(format_list_line(bm, "plain", False))
+        urls.append(url)
+    return lines, urls
+
 
-    if not entries:
+def read_menu_cache(signature: Tuple) -> Optional[Tuple[List[str], List[str]]]:
+    try:
+        version, key, lines, urls = marshal.loads(cache_path("menu").read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if version != MENU_CACHE_VERSION or key != signature:
+        return None
+    return lines, urls
+
+
+def write_menu_cache(signature: Tuple, lines: List[str], urls: List[str]) -> None:
+    try:
+        atomic_write(cache_path("menu"), marshal.dumps((MENU_CACHE_VERSION, signature, lines, urls)))
+    except OSError:
+        pass
+
+
+def launcher_menu() -> Tuple[List[str], List[str]]:
+    # The menu is rebuilt only when the store files change, so repeated
+    # launches skip loading and formatting every bookmark.
+    store = open_store()
+    signature = store.signature()
+    cached = read_menu_cache(signature)
+    if cached is not None:
+        return cached
+    lines, urls = build_menu(store.load())
+    write_menu_cache(signature, lines, urls)
+    return lines, urls
+
+
+def handle_cli_rofi(args: argparse.Namespace) -> int:
+    if not shutil.which("rofi"):
+        print("Error: rofi not found. Install rofi or use --list with your launcher.", file=sys.stderr)
+        return 2
+
+    lines, urls = launcher_menu()
+    if not lines:
         print("No bookmarks to show.", file=sys.stderr)
         return 1
 
-    proc = subprocess.run(
-        ["rofi", "-dmenu", "-p", "", "-i"],
-        input="\n".join(entries),
+    # "-format 'i s'" reports the row index, so the URL comes from the cached
+    # list rather than from parsing the displayed text back apart.
+    proc = subprocess.Popen(
+        ["rofi", "-dmenu", "-p", "", "-i", "-format", "i s"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
         text=True,
-        capture_output=True,
     )
-    if proc.returncode != 0:
+    try:
+        for start in range(0, len(lines), MENU_WRITE_LINES):
+            proc.stdin.write("\n".join(lines[start:start + MENU_WRITE_LINES]))
+            proc.stdin.write("\n")
+        proc.stdin.close()
+    except BrokenPipeError:  # rofi closed before reading the whole menu
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+    output = proc.stdout.read()
+    if proc.wait() != 0:
         return 1
 
-    choice = proc.stdout.strip()
-    if not choice:
+    position, _, choice = output.strip().partition(" ")
+    try:
+        row = int(position)
+    except ValueError:
         return 1
-
-    if " - " in choice:
-        _, url = choice.rsplit(" - ", 1)
+    if 0 <= row < len(urls):
+        url = urls[row]
     else:
-        url = choice
-    url = url.strip()
+        url = choice.strip()  # custom text typed into rofi
     if not url:
         print("Selected entry missing URL.", file=sys.stderr)
         return 2
@@ -1134,7 +3403,7 @@ class BookmarkHTMLParser(HTMLParser):
         super().__init__()
         self.standard_folders = {name.lower() for name in standard_folders}
         self.folder_stack: List[str] = []
-        self.bookmarks: List[Dict[str, str]] = []
+        self.bookmarks: List[Bookmark] = []
         self._capture_data = False
         self._current_link: Dict[str, str] = {}
         self._current_folder: str = ""
@@ -1165,8 +3434,10 @@ class BookmarkHTMLParser(HTMLParser):
             folder = self.folder_stack[-1] if self.folder_stack else "Import"
             title = self._current_link.get("title", "").strip()
             url = self._current_link.get("url", "").strip()
-            if url and title:
-                self.bookmarks.append({"title": title, "url": url, "folder": folder, "note": ""})
+            if url:
+                # Untitled links are titled with their URL, as -a does, so
+                # --enrich can fill in the page title later.
+                self.bookmarks.append(Bookmark(title or url, url, folder))
             self._current_link = {}
 
     def handle_data(self, data):
@@ -1178,51 +3449,753 @@ class BookmarkHTMLParser(HTMLParser):
             self._current_folder += data
 
 
-def import_bookmarks_html(path: Path) -> List[Dict[str, str]]:
-    standard = {
-        "bookmarks toolbar",
-        "bookmark toolbar",
-        "bookmarks bar",
-        "bookmarks menu",
-        "other bookmarks",
-        "other favourites",
-    }
-    parser = BookmarkHTMLParser(standard)
-    parser.feed(path.read_text(encoding="utf-8", errors="ignore"))
-    return parser.bookmarks
+STANDARD_FOLDERS = {
+    "bookmarks toolbar",
+    "bookmark toolbar",
+    "bookmarks bar",
+    "bookmarks menu",
+    "other bookmarks",
+    "other favourites",
+}
+IMPORT_CHUNK_SIZE = 64 * 1024
+IMPORT_BATCH_SIZE = 1000
+
+
+def iter_bookmarks_html(path: Path, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[Bookmark]:
+    parser = BookmarkHTMLParser(STANDARD_FOLDERS)
+    with path.open("r", encoding="utf-8", errors="ignore") as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            if parser.bookmarks:
+                yield from parser.bookmarks
+                parser.bookmarks = []
+    parser.close()
+    yield from parser.bookmarks
+
+
+def import_bookmarks_html(path: Path) -> List[Bookmark]:
+    return list(iter_bookmarks_html(path))
+
+
+def collect_import_sources(paths: List[str]) -> Tuple[List[Path], List[Path]]:
+    sources: List[Path] = []
+    missing: List[Path] = []
+    seen: Set[Path] = set()
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            found = sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in (".html", ".htm"))
+        elif path.exists():
+            found = [path]
+        else:
+            missing.append(path)
+            continue
+        for item in found:
+            key = item.resolve()
+            if key not in seen:
+                seen.add(key)
+                sources.append(item)
+    return sources, missing
+
+
+def report_import_throughput(path: Path, count: int, elapsed: float) -> None:
+    elapsed = max(elapsed, 1e-6)
+    try:
+        size = path.stat().st_size
+    except OSError:
+        size = 0
+    print(
+        f"{path}: {count} bookmarks in {elapsed:.2f}s "
+        f"({count / elapsed:.0f} bookmarks/s, {size / elapsed / (1024 * 1024):.1f} MiB/s)",
+        file=sys.stderr,
+    )
+
+
+def parse_export(path: str) -> Tuple[List[Tuple[str, str, str, str]], float]:
+    # Runs in a worker process; plain tuples keep the pickled result small.
+    started = time.perf_counter()
+    rows = [bm.as_tuple() for bm in iter_bookmarks_html(Path(path))]
+    return rows, time.perf_counter() - started
+
+
+def import_streaming(source: Path, urls: UrlIndex) -> int:
+    show_progress = sys.stderr.isatty()
+    started = time.perf_counter()
+    parsed = 0
+    batch: List[Dict] = []
+    for bm in iter_bookmarks_html(source):
+        parsed += 1
+        batch.extend(urls.admit(bm))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            commit_operations(batch)
+            batch = []
+            if show_progress:
+                print(f"\rImported {urls.added} bookmarks...", end="", file=sys.stderr, flush=True)
+    commit_operations(batch)
+    if show_progress and urls.added >= IMPORT_BATCH_SIZE:
+        print(file=sys.stderr)
+    report_import_throughput(source, parsed, time.perf_counter() - started)
+    return parsed
+
+
+def import_parallel(sources: List[Path], jobs: int, urls: UrlIndex) -> int:
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(len(sources), jobs if jobs > 0 else (os.cpu_count() or 1))
+    parsed = 0
+    ops: List[Dict] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in input order, so the merged result is deterministic
+        for source, (rows, elapsed) in zip(sources, pool.map(parse_export, [str(p) for p in sources])):
+            report_import_throughput(source, len(rows), elapsed)
+            parsed += len(rows)
+            for row in rows:
+                ops.extend(urls.admit(Bookmark(*row)))
+    commit_operations(ops)
+    return parsed
 
 
 def handle_cli_import(args: argparse.Namespace) -> int:
-    source = Path(args.import_html)
-    if not source.exists():
-        print(f"Error: file not found: {source}", file=sys.stderr)
+    sources, missing = collect_import_sources(args.import_html)
+    if missing:
+        for path in missing:
+            print(f"Error: file not found: {path}", file=sys.stderr)
         return 2
+    if not sources:
+        print("No HTML files found to import.", file=sys.stderr)
+        return 1
 
-    imported = import_bookmarks_html(source)
-    if not imported:
+    spool = UndoSpool()
+    try:
+        urls = UrlIndex(open_store(), args.allow_duplicates, spool)
+        if len(sources) == 1:
+            parsed = import_streaming(sources[0], urls)
+        else:
+            parsed = import_parallel(sources, args.jobs, urls)
+    except BaseException:
+        spool.discard()
+        raise
+    spool.save()
+    if not parsed:
         print("No bookmarks found in the HTML file.", file=sys.stderr)
         return 1
 
+    open_store().maintain()
+    origin = sources[0].name if len(sources) == 1 else f"{len(sources)} files"
+    message = f"Imported {urls.added} bookmarks from {origin}{urls.summary()}."
+    notify(message)
+    return 0
+
+
+def handle_cli_undo_import(args: argparse.Namespace) -> int:
+    history = UndoLog()
+    history.record(load_undo_group())
+    ops = history.undo()
+    if not ops:
+        print("No import to undo.", file=sys.stderr)
+        return 1
+    commit_operations(ops)
+    UNDO_FILE.unlink(missing_ok=True)
+    open_store().maintain()
+    notify(f"Undid the last import ({len(ops)} changes).")
+    return 0
+
+
+HTTP_USER_AGENT = "marks (bookmark manager)"
+HTTP_TIMEOUT = 10.0
+HTTP_RETRIES = 2
+HTTP_BACKOFF = 0.5
+HTTP_RETRY_STATUSES = {429, 502, 503, 504}
+HTTP_JOBS = 16
+HTTP_PER_HOST = 2
+HTTP_CHUNK_SIZE = 16 * 1024
+HTTP_DRAIN_LIMIT = 64 * 1024
+LINK_MAX_AGE_HOURS = 24.0
+LINK_SAVE_EVERY = 200
+
+
+def url_origin(url: str) -> Optional[Tuple[str, str, int]]:
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return None
+    return scheme, parts.hostname.lower(), port or DEFAULT_PORTS[scheme]
+
+
+# One keep-alive connection to an origin, reopened after errors or when a
+# response body was not read to the end. Used by a single thread at a time.
+class HostClient:
+    def __init__(self, origin: Tuple[str, str, int], timeout: float = HTTP_TIMEOUT):
+        self.origin = origin
+        self.timeout = timeout
+        self.conn: Optional["http.client.HTTPConnection"] = None
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _connect(self) -> "http.client.HTTPConnection":
+        if self.conn is None:
+            import http.client
+
+            scheme, host, port = self.origin
+            factory = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            self.conn = factory(host, port, timeout=self.timeout)
+        return self.conn
+
+    def fetch(
+        self,
+        method: str,
+        url: str,
+        max_body: int = 0,
+        sink: Optional[Callable[[Dict[str, str], bytes], bool]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        # Reads at most ``max_body`` bytes of the body. With a ``sink`` the
+        # body is streamed to it (with the response headers) in chunks
+        # instead, until it returns True.
+        import http.client
+
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        # IRIs may carry non-ASCII paths; escape them but keep existing escapes.
+        target = quote(target, safe="/%:@!$&'()*+,;=?~")
+        headers = {"User-Agent": HTTP_USER_AGENT, "Accept-Encoding": "identity"}
+        attempt = 0
+        while True:
+            streamed = False
+            try:
+                conn = self._connect()
+                conn.request(method, target, headers=headers)
+                response = conn.getresponse()
+                status = response.status
+                response_headers = {key.lower(): value for key, value in response.getheaders()}
+                retry = status in HTTP_RETRY_STATUSES and attempt < HTTP_RETRIES
+                body = b""
+                if method == "HEAD":
+                    response.read()
+                elif sink is not None and not retry:
+                    streamed = True
+                    self._stream(response, response_headers, max_body, sink)
+                elif max_body:
+                    body = response.read(max_body)
+                # The response has to be read to the end before the
+                # connection can carry the next request.
+                if response.isclosed():
+                    pass
+                elif response.length is not None and response.length <= HTTP_DRAIN_LIMIT:
+                    response.read()
+                else:
+                    self.close()  # body too large to drain; reconnect next time
+                if response.will_close:
+                    self.close()
+            except http.client.InvalidURL:
+                self.close()
+                raise  # the same request would fail again
+            except (OSError, http.client.HTTPException):
+                self.close()
+                if streamed or attempt >= HTTP_RETRIES:
+                    raise
+            else:
+                if not retry:
+                    return status, response_headers, body
+            time.sleep(HTTP_BACKOFF * (2 ** attempt))
+            attempt += 1
+
+    @staticmethod
+    def _stream(
+        response: "http.client.HTTPResponse",
+        headers: Dict[str, str],
+        max_body: int,
+        sink: Callable[[Dict[str, str], bytes], bool],
+    ) -> None:
+        total = 0
+        while total < max_body:
+            chunk = response.read1(min(HTTP_CHUNK_SIZE, max_body - total))
+            if not chunk:
+                return
+            total += len(chunk)
+            if sink(headers, chunk):
+                return
+
+
+# Spaces requests to one host ``interval`` seconds apart across its lanes.
+class HostThrottle:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def fetch_concurrently(
+    urls: List[str],
+    work: Callable[[HostClient, str], Dict],
+    on_result: Callable[[str, Dict], None],
+    jobs: int = HTTP_JOBS,
+    per_host: int = HTTP_PER_HOST,
+    interval: float = 0.0,
+    timeout: float = HTTP_TIMEOUT,
+) -> None:
+    # URLs are grouped by origin and each origin is split into at most
+    # ``per_host`` lanes; a lane runs its URLs in order over one reused
+    # connection, and a thread pool of ``jobs`` runs the lanes. on_result is
+    # called from the pool threads, one call at a time.
+    from concurrent.futures import ThreadPoolExecutor
+
+    by_origin: Dict[Tuple[str, str, int], List[str]] = {}
+    for url in urls:
+        origin = url_origin(url)
+        if origin is not None:
+            by_origin.setdefault(origin, []).append(url)
+    report = threading.Lock()
+
+    def run_lane(origin: Tuple[str, str, int], lane: List[str], throttle: HostThrottle) -> None:
+        client = HostClient(origin, timeout)
+        try:
+            for url in lane:
+                throttle.wait()
+                result = work(client, url)
+                with report:
+                    on_result(url, result)
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = []
+        for origin, members in by_origin.items():
+            lanes = max(1, min(per_host, len(members)))
+            throttle = HostThrottle(interval)
+            for lane in range(lanes):
+                futures.append(pool.submit(run_lane, origin, members[lane::lanes], throttle))
+        for future in futures:
+            future.result()
+
+
+def load_link_results() -> Dict[str, Dict]:
+    try:
+        with LINKS_FILE.open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_link_results(results: Dict[str, Dict]) -> None:
+    atomic_write(LINKS_FILE, json.dumps(results, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+
+
+def check_link(client: HostClient, url: str) -> Dict:
+    import http.client
+
+    result: Dict = {"checked_at": round(time.time())}
+    try:
+        status, headers, _ = client.fetch("HEAD", url)
+        if status >= 400:
+            # Plenty of servers reject or mishandle HEAD; ask again with GET.
+            status, headers, _ = client.fetch("GET", url)
+    except (OSError, ValueError, http.client.HTTPException) as exc:
+        result["status"] = None
+        result["error"] = str(exc) or type(exc).__name__
+        return result
+    result["status"] = status
+    location = headers.get("location")
+    if 300 <= status < 400 and location:
+        result["location"] = urljoin(url, location)
+    return result
+
+
+def link_is_broken(result: Dict) -> bool:
+    status = result.get("status")
+    return status is None or status >= 400
+
+
+def handle_cli_check_links(args: argparse.Namespace) -> int:
     bookmarks = load_bookmarks()
-    bookmarks.extend(imported)
-    save_bookmarks(bookmarks)
-    message = f"Imported {len(imported)} bookmarks from {source.name}."
-    if shutil.which("notify-send"):
-        subprocess.run(["notify-send", "marks", message], check=False)
-    else:
-        print(message)
+    results = load_link_results()
+    cutoff = time.time() - args.max_age * 3600
+    pending: List[str] = []
+    seen: Set[str] = set()
+    skipped = 0
+    for bm in bookmarks:
+        url = bm.url
+        if url in seen or url_origin(url) is None:
+            continue
+        seen.add(url)
+        previous = results.get(url)
+        if previous and previous.get("checked_at", 0) >= cutoff:
+            skipped += 1
+            continue
+        pending.append(url)
+
+    show_progress = sys.stderr.isatty()
+    done = 0
+
+    def record(url: str, result: Dict) -> None:
+        nonlocal done
+        results[url] = result
+        done += 1
+        if done % LINK_SAVE_EVERY == 0:
+            save_link_results(results)  # an interrupted run resumes from here
+        if show_progress:
+            print(f"\rChecked {done}/{len(pending)} links...", end="", file=sys.stderr, flush=True)
+
+    try:
+        fetch_concurrently(
+            pending,
+            check_link,
+            record,
+            jobs=args.jobs or HTTP_JOBS,
+            per_host=args.per_host,
+            timeout=args.timeout,
+        )
+    finally:
+        if show_progress and done:
+            print(file=sys.stderr)
+        save_link_results(results)
+
+    broken = redirected = 0
+    lines: List[str] = []
+    for bm in bookmarks:
+        result = results.get(bm.url)
+        if not result:
+            continue
+        if link_is_broken(result):
+            broken += 1
+            label = str(result["status"]) if result.get("status") else "ERR"
+            lines.append(f"{label}\t{format_list_line(bm, 'plain', False)}")
+        elif result.get("location"):
+            redirected += 1
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+    notify(
+        f"Checked {done} links ({skipped} checked recently, skipped): "
+        f"{broken} broken, {redirected} redirected."
+    )
     return 0
 
 
-if __name__ == "__main__":
-    cli_args = parse_args()
+ENRICH_META = {"description", "og:description", "og:title", "twitter:description"}
+ENRICH_HEAD_LIMIT = 256 * 1024
+ENRICH_NOTE_LIMIT = 300
+ENRICH_REDIRECTS = 5
+ENRICH_RATE = 2.0
+ENRICH_CACHE_DIR = CACHE_DIR / "enrich"
+
+
+# Collects the title and description meta tags of a page; ``done`` turns
+# true once the head is over so the caller can stop downloading.
+class PageHeadParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.meta: Dict[str, str] = {}
+        self.done = False
+        self._title_parts: List[str] = []
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        tag = tag.lower()
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            attrs_dict = dict(attrs)
+            key = (attrs_dict.get("name") or attrs_dict.get("property") or "").lower()
+            content = (attrs_dict.get("content") or "").strip()
+            if key in ENRICH_META and content:
+                self.meta.setdefault(key, content)
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        tag = tag.lower()
+        if tag == "title":
+            self._in_title = False
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+
+    @property
+    def title(self) -> str:
+        title = " ".join("".join(self._title_parts).split())
+        return title or self.meta.get("og:title", "")
+
+    @property
+    def description(self) -> str:
+        for key in ("description", "og:description", "twitter:description"):
+            if key in self.meta:
+                return " ".join(self.meta[key].split())[:ENRICH_NOTE_LIMIT]
+        return ""
+
+
+def enrich_cache_file(url: str) -> Path:
+    return ENRICH_CACHE_DIR / (hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+
+def read_enrich_cache(url: str) -> Optional[Dict]:
+    try:
+        with enrich_cache_file(url).open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get("url") == url else None
+
+
+def write_enrich_cache(result: Dict) -> None:
+    try:
+        atomic_write(enrich_cache_file(result["url"]), json.dumps(result, ensure_ascii=False).encode("utf-8"))
+    except OSError:
+        pass
+
+
+def page_decoder(headers: Dict[str, str]) -> codecs.IncrementalDecoder:
+    charset = "utf-8"
+    for param in headers.get("content-type", "").split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            charset = value.strip("\"'")
+    try:
+        return codecs.getincrementaldecoder(charset)(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def fetch_page_head(client: HostClient, url: str) -> Dict:
+    # Follows redirects (other hosts get a one-off connection) and feeds the
+    # body to PageHeadParser only until </head> or <body> shows up.
+    import http.client
+
+    result: Dict = {"url": url, "fetched_at": round(time.time())}
+    target = url
+    try:
+        for _ in range(ENRICH_REDIRECTS + 1):
+            origin = url_origin(target)
+            if origin is None:
+                break
+            current = client if origin == client.origin else HostClient(origin, client.timeout)
+            parser = PageHeadParser()
+            decoders: List[codecs.IncrementalDecoder] = []
+            parse_errors: List[str] = []
+
+            def feed(headers: Dict[str, str], chunk: bytes) -> bool:
+                if not decoders:
+                    decoders.append(page_decoder(headers))
+                try:
+                    parser.feed(decoders[0].decode(chunk))
+                except (AssertionError, ValueError) as exc:
+                    # HTMLParser asserts on some malformed markup, such as a
+                    # broken <![...[ marked section; give up on this page only.
+                    parse_errors.append(f"unparsable page ({exc or type(exc).__name__})")
+                    return True
+                return parser.done
+
+            try:
+                status, headers, _ = current.fetch("GET", target, ENRICH_HEAD_LIMIT, feed)
+            finally:
+                if current is not client:
+                    current.close()
+            location = headers.get("location")
+            if 300 <= status < 400 and location:
+                target = urljoin(target, location)
+                continue
+            result["status"] = status
+            if parse_errors:
+                result["error"] = parse_errors[0]
+            elif status < 400:
+                result["title"] = parser.title
+                result["description"] = parser.description
+            break
+    except (OSError, ValueError, http.client.HTTPException) as exc:
+        result["error"] = str(exc) or type(exc).__name__
+    return result
+
+
+def needs_title(bm: Bookmark) -> bool:
+    title = bm.title.strip()
+    return not title or title == bm.url or url_origin(title) is not None
+
+
+def handle_cli_enrich(args: argparse.Namespace) -> int:
+    tokens = normalize_search(" ".join(args.query))
+    bookmarks = load_bookmarks()
+    wanted = folder_key(args.folder) if args.folder else None
+    targets: List[int] = []
+    for position, bm in enumerate(bookmarks):
+        if wanted is not None and folder_key(bm.folder) != wanted:
+            continue
+        if not bookmark_matches(bm, tokens) or url_origin(bm.url) is None:
+            continue
+        if needs_title(bm) or not bm.note:
+            targets.append(position)
+
+    pages: Dict[str, Dict] = {}
+    fetch: List[str] = []
+    for position in targets:
+        url = bookmarks[position].url
+        if url in pages or url in fetch:
+            continue
+        cached = read_enrich_cache(url)
+        if cached is not None:
+            pages[url] = cached
+        else:
+            fetch.append(url)
+
+    show_progress = sys.stderr.isatty()
+    done = [0]
+
+    def record(url: str, result: Dict) -> None:
+        pages[url] = result
+        if "title" in result and "error" not in result:
+            write_enrich_cache(result)  # failures and error statuses are retried next run
+        if show_progress:
+            done[0] += 1
+            print(f"\rFetched {done[0]}/{len(fetch)} pages...", end="", file=sys.stderr, flush=True)
+
+    fetch_concurrently(
+        fetch,
+        fetch_page_head,
+        record,
+        jobs=args.jobs or HTTP_JOBS,
+        per_host=args.per_host,
+        interval=1.0 / args.rate if args.rate > 0 else 0.0,
+        timeout=args.timeout,
+    )
+    if show_progress and fetch:
+        print(file=sys.stderr)
+
+    ops: List[Dict] = []
+    failed = 0
+    for position in targets:
+        bm = bookmarks[position]
+        page = pages.get(bm.url, {})
+        if "title" not in page:
+            failed += 1
+            continue
+        changes: Dict[str, str] = {}
+        if needs_title(bm) and page["title"]:
+            changes["title"] = page["title"]
+        if not bm.note and page.get("description"):
+            changes["note"] = page["description"]
+        if changes:
+            ops.append({"op": "edit", "index": position, "old": bm.to_dict(), "bookmark": bm.replace(**changes).to_dict()})
+    commit_operations(ops)
+    if ops:
+        open_store().maintain()
+    notify(
+        f"Enriched {len(ops)} of {len(targets)} bookmarks "
+        f"({len(fetch)} pages fetched, {len(pages) - len(fetch)} from cache, {failed} without a page)."
+    )
+    return 0
+
+
+def handle_cli_compact(args: argparse.Namespace) -> int:
+    compact_bookmarks()
+    return 0
+
+
+def handle_cli_dedupe(args: argparse.Namespace) -> int:
+    counts = {}
+
+    def collapse(bookmarks: List[Bookmark]) -> List[Bookmark]:
+        kept = dedupe_bookmarks(bookmarks)
+        counts["before"], counts["after"] = len(bookmarks), len(kept)
+        return kept
+
+    rewrite_store(collapse)
+    print(f"Removed {counts['before'] - counts['after']} duplicates; {counts['after']} bookmarks left.")
+    return 0
+
+
+def handle_cli_migrate(args: argparse.Namespace) -> int:
+    target = SqliteStore(Path(args.migrate_sqlite) if args.migrate_sqlite else sqlite_path())
+    if target.path == DATA_FILE:
+        print("Error: the data file is already a SQLite database.", file=sys.stderr)
+        return 2
+    existing = target.conn.execute("SELECT COUNT(*) FROM bookmarks").fetchone()[0]
+    if existing:
+        print(f"Error: {target.path} already contains {existing} bookmarks.", file=sys.stderr)
+        return 1
+    bookmarks = JsonStore().load()
+    target.save(bookmarks)
+    print(f"Migrated {len(bookmarks)} bookmarks to {target.path}.")
+    print(f"Use it with MARKS_DATA_FILE={target.path} or MARKS_BACKEND=sqlite.")
+    return 0
+
+
+def dispatch(cli_args: argparse.Namespace) -> int:
+    if cli_args.compact:
+        return handle_cli_compact(cli_args)
+    if cli_args.dedupe:
+        return handle_cli_dedupe(cli_args)
+    if cli_args.migrate_sqlite is not None:
+        return handle_cli_migrate(cli_args)
     if cli_args.import_html:
-        raise SystemExit(handle_cli_import(cli_args))
+        return handle_cli_import(cli_args)
+    if cli_args.undo_import:
+        return handle_cli_undo_import(cli_args)
+    if cli_args.check_links:
+        return handle_cli_check_links(cli_args)
+    if cli_args.enrich:
+        return handle_cli_enrich(cli_args)
     if cli_args.rofi:
-        raise SystemExit(handle_cli_rofi(cli_args))
+        return handle_cli_rofi(cli_args)
     if cli_args.list:
-        raise SystemExit(handle_cli_list(cli_args))
+        return handle_cli_list(cli_args)
     if cli_args.add:
-        raise SystemExit(handle_cli_add(cli_args))
+        return handle_cli_add(cli_args)
+    if cli_args.add_batch:
+        return handle_cli_add_batch(cli_args)
 
     curses.wrapper(main)
+    return 0
+
+
+def start_profiler(cli_args: argparse.Namespace) -> None:
+    target = cli_args.profile or os.environ.get("MARKS_PROFILE", "").strip()
+    if target.lower() in ("0", "false", "no", "off"):
+        target = ""
+    if not target and not cli_args.cprofile:
+        return
+    if target.lower() in ("", "1", "true", "yes", "on"):
+        path = PROFILE_FILE
+    else:
+        path = Path(target).expanduser()
+    PROFILER.start(path, Path(cli_args.cprofile).expanduser() if cli_args.cprofile else None)
+    PROFILER.record("startup", time.perf_counter() - PROFILER.started)
+
+
+if __name__ == "__main__":
+    cli_args = parse_args()
+    start_profiler(cli_args)
+    try:
+        with PROFILER.phase("run"):
+            exit_code = dispatch(cli_args)
+    except StorageError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        exit_code = 2
+    finally:
+        PROFILER.stop()
+    report_lock_wait()
+    raise SystemExit(exit_code)
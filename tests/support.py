@@ -0,0 +1,94 @@
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import main
+
+
+# Points the data file, its neighbours and the cache at a temporary directory.
+class StoreTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        data = self.root / "bookmarks.json"
+        paths = {
+            "DATA_FILE": data,
+            "JOURNAL_FILE": data.with_name(data.name + ".journal"),
+            "LOCK_FILE": data.with_name(data.name + ".lock"),
+            "UNDO_FILE": data.with_name(data.name + ".undo"),
+            "LINKS_FILE": data.with_name(data.name + ".links"),
+            "CACHE_DIR": self.root / "cache",
+            "ENRICH_CACHE_DIR": self.root / "cache" / "enrich",
+            "_STORE": None,
+        }
+        for name, value in paths.items():
+            patcher = mock.patch.object(main, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+# A keep-alive HTTP server on 127.0.0.1 serving ``routes``: path (without
+# the query) -> method ("*" for any) -> (status, headers, body). Each request
+# is logged as (method, path, monotonic time) and ``peak`` is the most requests it was
+# ever serving at once; ``delay`` holds every response back that long.
+class LocalServer:
+    def __init__(self, routes, delay=0.0):
+        self.routes = routes
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def respond(self):
+                path = self.path.partition("?")[0]
+                with server.lock:
+                    server.requests.append((self.command, path, time.monotonic()))
+                    server.active += 1
+                    server.peak = max(server.peak, server.active)
+                try:
+                    time.sleep(server.delay)
+                    methods = server.routes.get(path, {})
+                    status, headers, body = methods.get(self.command) or methods.get("*") or (404, {}, b"")
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    if self.command != "HEAD":
+                        self.wfile.write(body)
+                finally:
+                    with server.lock:
+                        server.active -= 1
+
+            do_GET = do_HEAD = respond
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+
+    def hits(self, path, method=None):
+        return [entry for entry in self.requests if entry[1] == path and method in (None, entry[0])]
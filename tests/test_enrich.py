@@ -0,0 +1,74 @@
+import argparse
+import unittest
+from unittest import mock
+
+import main
+from support import LocalServer, StoreTestCase
+
+LATIN1 = (
+    "<html><head><title>Caf\xe9  au lait</title>"
+    "<meta name='description' content='Cr\xe8me br\xfbl\xe9e'></head><body>x</body></html>"
+).encode("latin-1")
+ROUTES = {
+    "/latin1": {"*": (200, {"Content-Type": "text/html; charset=iso-8859-1"}, LATIN1)},
+    "/plain": {"*": (200, {"Content-Type": "text/html"}, "<title>Stra\xdfe</title>".encode("utf-8"))},
+    "/moved": {"*": (302, {"Location": "/plain"}, b"")},
+    "/missing": {"*": (404, {"Content-Type": "text/html"}, b"<title>Not Found</title>")},
+}
+
+
+class FetchPageHeadTest(unittest.TestCase):
+    def fetch(self, server, path):
+        client = main.HostClient(main.url_origin(server.url(path)), timeout=5)
+        try:
+            return main.fetch_page_head(client, server.url(path))
+        finally:
+            client.close()
+
+    def test_decodes_declared_charset(self):
+        with LocalServer(ROUTES) as server:
+            result = self.fetch(server, "/latin1")
+        self.assertEqual(result["status"], 200)
+        self.assertEqual(result["title"], "Caf\xe9 au lait")
+        self.assertEqual(result["description"], "Cr\xe8me br\xfbl\xe9e")
+
+    def test_follows_redirects(self):
+        with LocalServer(ROUTES) as server:
+            result = self.fetch(server, "/moved")
+            self.assertEqual([path for _, path, _ in server.requests], ["/moved", "/plain"])
+        self.assertEqual(result["status"], 200)
+        self.assertEqual(result["title"], "Stra\xdfe")
+
+    def test_error_status_has_no_title(self):
+        with LocalServer(ROUTES) as server:
+            result = self.fetch(server, "/missing")
+        self.assertEqual(result["status"], 404)
+        self.assertNotIn("title", result)
+
+
+class EnrichCommandTest(StoreTestCase):
+    def run_enrich(self):
+        args = argparse.Namespace(query=[], folder=None, jobs=4, per_host=2, rate=0.0, timeout=5)
+        with mock.patch.object(main, "notify"):
+            self.assertEqual(main.handle_cli_enrich(args), 0)
+
+    def test_fills_titles_and_caches_successful_pages(self):
+        with LocalServer(ROUTES) as server:
+            urls = [server.url(path) for path in ("/plain", "/latin1", "/missing")]
+            main.JsonStore().save([main.make_bookmark("", url) for url in urls])
+            self.run_enrich()
+            bookmarks = main.load_bookmarks()
+            self.assertEqual([bm.title for bm in bookmarks], ["Stra\xdfe", "Caf\xe9 au lait", urls[2]])
+            self.assertEqual(bookmarks[1].note, "Cr\xe8me br\xfbl\xe9e")
+            self.assertIsNotNone(main.read_enrich_cache(urls[0]))
+            self.assertIsNone(main.read_enrich_cache(urls[2]))
+
+            # /plain still has no note, but its page comes from the cache;
+            # only the failed page is fetched again.
+            self.run_enrich()
+            self.assertEqual(len(server.hits("/plain")), 1)
+            self.assertEqual(len(server.hits("/missing")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
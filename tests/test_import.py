@@ -0,0 +1,60 @@
+import argparse
+import unittest
+from unittest import mock
+
+import main
+from support import StoreTestCase
+
+EXPORT = """<!DOCTYPE NETSCAPE-Bookmark-file-1>
+<DL><p>
+<DT><H3>Bookmarks bar</H3>
+<DL><p>
+<DT><H3>Dev</H3>
+<DL><p>
+<DT><A HREF="https://example.com/a" ADD_DATE="1">A</A>
+<DT><A HREF="https://example.com/b/">B</A>
+<DT><A HREF="https://example.com/b">B again</A>
+<DT><A HREF="https://example.com/untitled"></A>
+</DL><p>
+</DL><p>
+</DL><p>
+"""
+
+
+class ImportUndoTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(main, "notify")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.export = self.root / "export.html"
+        self.export.write_text(EXPORT, encoding="utf-8")
+        main.JsonStore().save([main.Bookmark("Existing", "https://example.com/x")])
+
+    def import_html(self):
+        args = argparse.Namespace(import_html=[str(self.export)], allow_duplicates=False, jobs=0)
+        return main.handle_cli_import(args)
+
+    def test_import_streams_undo_group(self):
+        self.assertEqual(self.import_html(), 0)
+        titles = [bm.title for bm in main.load_bookmarks()]
+        self.assertEqual(titles, ["Existing", "A", "B", "https://example.com/untitled"])
+        self.assertTrue(main.needs_title(main.load_bookmarks()[-1]))
+        self.assertEqual(len(main.load_undo_group()), 3)
+        self.assertEqual(list(main.UNDO_FILE.parent.glob(".*.tmp")), [])
+
+        self.assertEqual(main.handle_cli_undo_import(argparse.Namespace()), 0)
+        self.assertEqual([bm.title for bm in main.load_bookmarks()], ["Existing"])
+        self.assertFalse(main.UNDO_FILE.exists())
+
+    def test_failed_import_keeps_previous_group(self):
+        self.import_html()
+        with mock.patch.object(main, "import_streaming", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.import_html()
+        self.assertEqual(len(main.load_undo_group()), 3)
+        self.assertEqual(list(main.UNDO_FILE.parent.glob(".*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import argparse
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import main
+from support import LocalServer, StoreTestCase
+
+OK = (200, {"Content-Type": "text/html"}, b"<html></html>")
+ROUTES = {
+    "/ok": {"*": OK},
+    "/no-head": {"HEAD": (405, {}, b""), "GET": OK},
+    "/old": {"*": (301, {"Location": "/ok"}, b"")},
+    "/missing": {"*": (404, {}, b"gone")},
+    "/wiki/Stra%C3%9Fe": {"*": OK},
+}
+
+
+class CheckLinkTest(unittest.TestCase):
+    def check(self, server, path):
+        client = main.HostClient(main.url_origin(server.url(path)), timeout=5)
+        try:
+            return main.check_link(client, server.url(path))
+        finally:
+            client.close()
+
+    def test_head_then_get_fallback(self):
+        with LocalServer(ROUTES) as server:
+            self.assertEqual(self.check(server, "/ok")["status"], 200)
+            self.assertEqual(len(server.hits("/ok", "GET")), 0)
+            result = self.check(server, "/no-head")
+            self.assertEqual(result["status"], 200)
+            self.assertEqual([method for method, _, _ in server.hits("/no-head")], ["HEAD", "GET"])
+
+    def test_redirect_and_broken(self):
+        with LocalServer(ROUTES) as server:
+            result = self.check(server, "/old")
+            self.assertEqual(result["status"], 301)
+            self.assertEqual(result["location"], server.url("/ok"))
+            self.assertFalse(main.link_is_broken(result))
+            result = self.check(server, "/missing")
+            self.assertEqual(result["status"], 404)
+            self.assertTrue(main.link_is_broken(result))
+
+    def test_non_ascii_path_is_percent_encoded(self):
+        with LocalServer(ROUTES) as server:
+            self.assertEqual(self.check(server, "/wiki/Straße")["status"], 200)
+            self.assertEqual(self.check(server, "/wiki/Stra%C3%9Fe")["status"], 200)
+            self.assertEqual(len(server.hits("/wiki/Stra%C3%9Fe", "HEAD")), 2)
+
+    def test_connection_error(self):
+        client = main.HostClient(("http", "127.0.0.1", 9), timeout=1)
+        with mock.patch.object(main, "HTTP_BACKOFF", 0):
+            result = main.check_link(client, "http://127.0.0.1:9/")
+        self.assertIsNone(result["status"])
+        self.assertTrue(main.link_is_broken(result))
+
+
+class FetchConcurrentlyTest(unittest.TestCase):
+    def test_per_host_limit(self):
+        with LocalServer(ROUTES, delay=0.05) as server:
+            results = {}
+            urls = [server.url("/ok") + f"?n={n}" for n in range(8)]
+            main.fetch_concurrently(urls, main.check_link, results.__setitem__, jobs=8, per_host=2, timeout=5)
+            self.assertEqual(sorted(results), sorted(urls))
+            self.assertEqual({result["status"] for result in results.values()}, {200})
+            self.assertEqual(server.peak, 2)
+
+    def test_interval_spaces_requests(self):
+        with LocalServer(ROUTES) as server:
+            urls = [server.url("/ok") + f"?n={n}" for n in range(4)]
+            main.fetch_concurrently(
+                urls, main.check_link, lambda url, result: None, per_host=2, interval=0.1, timeout=5
+            )
+            times = sorted(at for _, _, at in server.requests)
+            self.assertEqual(len(times), 4)
+            for earlier, later in zip(times, times[1:]):
+                self.assertGreaterEqual(later - earlier, 0.08)
+
+
+class CheckLinksCommandTest(StoreTestCase):
+    def run_check(self):
+        args = argparse.Namespace(max_age=24.0, jobs=4, per_host=2, timeout=5)
+        out = io.StringIO()
+        with mock.patch.object(main, "notify"), redirect_stdout(out):
+            self.assertEqual(main.handle_cli_check_links(args), 0)
+        return out.getvalue()
+
+    def test_reports_broken_and_skips_recent(self):
+        with LocalServer(ROUTES) as server:
+            main.JsonStore().save(
+                [main.Bookmark(path, server.url(path)) for path in ("/ok", "/no-head", "/old", "/missing")]
+            )
+            out = self.run_check()
+            self.assertEqual(out.splitlines(), [f"404\t[General] /missing - {server.url('/missing')}"])
+            with main.LINKS_FILE.open(encoding="utf-8") as fh:
+                results = json.load(fh)
+            self.assertEqual(results[server.url("/old")]["location"], server.url("/ok"))
+            seen = len(server.requests)
+            self.run_check()
+            self.assertEqual(len(server.requests), seen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import main
+from support import StoreTestCase
+
+BOOKMARKS = [
+    main.Bookmark("Angry birds", "https://a.example.com", "Ärger"),
+    main.Bookmark("Streets", "https://b.example.com", "STRASSE"),
+    main.Bookmark("Other", "https://c.example.com", "General"),
+]
+
+
+class FolderQueryTest(StoreTestCase):
+    def check(self, store):
+        store.save(BOOKMARKS)
+        self.assertEqual(list(store.query([], "ärger")), BOOKMARKS[:1])
+        self.assertEqual(list(store.query([], "straße")), BOOKMARKS[1:2])
+        self.assertEqual(list(store.query(["birds"], "ÄRGER")), BOOKMARKS[:1])
+
+    def test_json_folder_is_casefolded(self):
+        self.check(main.JsonStore())
+
+    def test_sqlite_folder_is_casefolded(self):
+        store = main.SqliteStore(self.root / "bookmarks.db")
+        self.addCleanup(store.close)
+        self.check(store)
+
+
+class LauncherMenuTest(StoreTestCase):
+    def test_menu_matches_list_lines(self):
+        bookmarks = BOOKMARKS + [main.Bookmark("No link", "", "General")]
+        main.JsonStore().save(bookmarks)
+        lines, urls = main.launcher_menu()
+        self.assertEqual(lines, [main.format_list_line(bm, "plain", False) for bm in BOOKMARKS])
+        self.assertEqual(urls, [bm.url for bm in BOOKMARKS])
+        self.assertTrue(main.cache_path("menu").exists())
+        self.assertEqual(main.launcher_menu(), (lines, urls))
+
+
+if __name__ == "__main__":
+    unittest.main()
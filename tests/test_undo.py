@@ -0,0 +1,116 @@
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+import main
+
+
+def sample(count):
+    return [main.Bookmark(f"entry{i}", f"https://example.com/{i}", "General") for i in range(count)]
+
+
+# Replays what the TUI's perform() does with the ops an UndoLog hands out.
+def perform(index, history, op, record=True):
+    if op["op"] == "add":
+        bookmark = main.clean_bookmark(op["bookmark"])
+        position = index.insert(op.get("index", len(index.bookmarks)), bookmark)
+        delta = (position, None, bookmark.as_tuple())
+    else:
+        delta = (op["index"], index.remove(op["index"]).as_tuple(), None)
+    if record:
+        history.record([delta])
+
+
+class UndoTopRowTest(unittest.TestCase):
+    def check_index(self, index, expected):
+        self.assertEqual(index.bookmarks, expected)
+        self.assertEqual(index.ids, sorted(set(index.ids)))
+        self.assertGreaterEqual(index.ids[0], 0)
+        for position, bm in enumerate(expected):
+            self.assertIn(position, index.search([bm.title]))
+
+    def test_undo_deletes_at_top(self):
+        original = sample(5)
+        index = main.BookmarkIndex(list(original))
+        history = main.UndoLog()
+        perform(index, history, {"op": "delete", "index": 0})
+        perform(index, history, {"op": "delete", "index": 0})
+        for _ in range(2):
+            for op in history.undo():
+                perform(index, history, op, record=False)
+        self.check_index(index, original)
+
+    def test_repeated_inserts_at_top_renumber(self):
+        index = main.BookmarkIndex(sample(3))
+        expected = list(index.bookmarks)
+        for i in range(main.ID_STRIDE * 2):
+            bookmark = main.Bookmark(f"top{i}", f"https://top.example.com/{i}")
+            index.insert(0, bookmark)
+            expected.insert(0, bookmark)
+        self.check_index(index, expected)
+        for i in range(2):
+            bookmark = main.Bookmark(f"tail{i}", f"https://tail.example.com/{i}", "Other")
+            index.add(bookmark)
+            expected.append(bookmark)
+        self.check_index(index, expected)
+        self.assertEqual(index.folder_positions("Other"), [len(expected) - 2, len(expected) - 1])
+
+
+class SqliteUndoTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = main.SqliteStore(Path(tmp.name) / "bookmarks.db")
+        self.addCleanup(self.store.close)
+        self.original = sample(8)
+        self.store.save(self.original)
+
+    def replay(self, ops):
+        # The list the TUI holds, kept next to the store like Autosaver does.
+        bookmarks = self.store.load()
+        history = main.UndoLog()
+        for op in ops:
+            history.record([(op["index"], bookmarks.pop(op["index"]).as_tuple(), None)])
+            self.store.commit([op])
+        return bookmarks, history
+
+    def check_store(self, bookmarks):
+        rows = list(self.store.conn.execute("SELECT id FROM bookmarks ORDER BY id"))
+        self.assertEqual(self.store.row_ids, [row_id for (row_id,) in rows])
+        fresh = main.SqliteStore(self.store.path)
+        self.addCleanup(fresh.close)
+        self.assertEqual(fresh.load(), bookmarks)
+        if self.store.has_fts:
+            for position, bm in enumerate(bookmarks):
+                self.assertEqual(self.store.candidates([bm.title]), [position])
+
+    def undo_all(self, bookmarks, history):
+        while True:
+            ops = history.undo()
+            if not ops:
+                return
+            for op in ops:
+                bookmarks.insert(op["index"], main.clean_bookmark(op["bookmark"]))
+            self.store.commit(ops)
+            self.check_store(bookmarks)
+
+    def test_undo_reuses_freed_ids_in_order(self):
+        bookmarks, history = self.replay([{"op": "delete", "index": 4}, {"op": "delete", "index": 3}])
+        self.undo_all(bookmarks, history)
+        self.assertEqual(bookmarks, self.original)
+        self.assertEqual(self.store.row_ids, list(range(1, 9)))
+
+    def test_undo_without_gap_shifts_later_rows(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            self.store.save(self.original)
+            self.store.load()
+            ops = [{"op": "delete", "index": rng.randrange(8 - n)} for n in range(rng.randrange(1, 6))]
+            bookmarks, history = self.replay(ops)
+            self.undo_all(bookmarks, history)
+            self.assertEqual(bookmarks, self.original)
+
+
+if __name__ == "__main__":
+    unittest.main()
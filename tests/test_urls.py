@@ -0,0 +1,50 @@
+import unittest
+
+import main
+from support import StoreTestCase
+
+
+class JsonUrlLookupTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = main.JsonStore()
+        self.store.save([main.Bookmark(f"t{i}", f"https://example.com/{i}") for i in range(5)])
+
+    def test_lookup_from_snapshot(self):
+        size, find = self.store.url_lookup()
+        self.assertEqual(size, 5)
+        self.assertEqual(find(main.canonical_url("HTTPS://example.com/3/?utm_source=x")), (3, self.store.load()[3]))
+        self.assertIsNone(find(main.canonical_url("https://example.com/9")))
+        self.assertTrue(main.cache_path("urls").exists())
+
+    def test_lookup_follows_journal(self):
+        self.store.url_lookup()  # caches the snapshot index
+        bookmarks = self.store.load()
+        self.store.commit(
+            [
+                {"op": "delete", "index": 0, "old": bookmarks[0].to_dict()},
+                {"op": "add", "bookmark": main.Bookmark("new", "https://new.example.com").to_dict()},
+                {
+                    "op": "edit",
+                    "index": 1,
+                    "old": bookmarks[2].to_dict(),
+                    "bookmark": {"title": "t2", "url": "https://moved.example.com"},
+                },
+            ]
+        )
+        size, find = self.store.url_lookup()
+        self.assertEqual(size, 5)
+        self.assertIsNone(find(main.canonical_url("https://example.com/0")))
+        self.assertIsNone(find(main.canonical_url("https://example.com/2")))
+        self.assertEqual(find(main.canonical_url("https://example.com/3"))[0], 2)
+        self.assertEqual(find(main.canonical_url("https://moved.example.com"))[0], 1)
+        self.assertEqual(find(main.canonical_url("https://new.example.com"))[0], 4)
+
+    def test_compaction_indexes_urls(self):
+        self.store.commit([{"op": "add", "bookmark": main.Bookmark("new", "https://new.example.com").to_dict()}])
+        self.store.compact()
+        self.assertEqual(main.read_url_index(main.path_signature(main.DATA_FILE))[0], 6)
+
+
+if __name__ == "__main__":
+    unittest.main()